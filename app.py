@@ -1,21 +1,39 @@
 # app_encabezado.py 
 # -*- coding: utf-8 -*-
 import os
-import sqlite3
-import io
 import base64
+import hashlib
+import hmac
+import html
 import secrets
 import string
+import threading
+import time
+from collections import deque
 from datetime import date
 from pathlib import Path
 
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import metrics
+from metrics import timed
+from storage import (
+    DB_PATH, DUE_LIMIT, DUE_SOON_DAYS, ESTADOS, EXCEL_FILE, EXPORT_FORMATS, ITEMS_MONITOREO, PAGE_SIZES,
+    REGIONES, SEARCH_COLUMNS, SEARCH_LIMIT, SOFT_DELETE, SORT_COLUMNS,
+    ConflictError,
+    available_export_formats, build_export_bytes, delete_records, export_to_excel, fts_query,
+    get_excel_mirror, get_pool, get_record, get_table_version, highlight_snippet, import_from_fixed_excel,
+    init_db, insert_record, list_partitions, load_all_records, load_count, load_due_counts, load_due_records,
+    load_filtered_count, load_history, load_records_page, load_search, load_summary, merge_records,
+    purge_deleted_records, purge_history, restore_records, sync_from_fixed_excel, update_record,
+)
 
 # =========================
 # Configuración base
 # =========================
-st.set_page_config(page_title="SEGUIMIENTO REGIONAL 2025", layout="wide")
+PAGE_TITLE = f"SEGUIMIENTO REGIONAL {date.today().year}"
 
 # =========================
 # Base de datos de usuarios
@@ -24,7 +42,7 @@ USER_DB_PATH = Path("usuarios.db")
 
 def init_user_db():
     """Inicializa la base de datos de usuarios"""
-    with sqlite3.connect(USER_DB_PATH) as con:
+    with get_pool(USER_DB_PATH).connection(write=True) as con:
         con.execute("""
             CREATE TABLE IF NOT EXISTS usuarios(
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -33,6 +51,17 @@ def init_user_db():
                 secret_word TEXT NOT NULL
             );
         """)
+        # Sesiones persistentes: se guarda el hash del identificador, no el token
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS sesiones(
+                token_hash TEXT PRIMARY KEY,
+                email TEXT NOT NULL,
+                created_at INTEGER NOT NULL,
+                expires_at INTEGER NOT NULL
+            );
+        """)
+        con.execute("CREATE INDEX IF NOT EXISTS idx_sesiones_expira ON sesiones(expires_at)")
+        con.execute("CREATE INDEX IF NOT EXISTS idx_sesiones_email ON sesiones(email)")
         
         # Insertar usuarios por defecto si no existen
         usuarios_por_defecto = [
@@ -48,11 +77,17 @@ def init_user_db():
                 )
             except Exception as e:
                 st.error(f"Error al insertar usuario {email}: {str(e)}")
-        con.commit()
 
+@st.cache_resource
+def init_user_db_once(db_path):
+    """Ejecuta init_user_db una sola vez por proceso"""
+    init_user_db()
+    return True
+
+@timed()
 def get_user(email):
     """Obtiene un usuario por email"""
-    with sqlite3.connect(USER_DB_PATH) as con:
+    with get_pool(USER_DB_PATH).connection() as con:
         cur = con.execute("SELECT * FROM usuarios WHERE email = ?", (email,))
         result = cur.fetchone()
         if result:
@@ -64,15 +99,103 @@ def get_user(email):
             }
         return None
 
+@timed()
 def update_user_password(email, new_password):
-    """Actualiza la contraseña de un usuario"""
-    with sqlite3.connect(USER_DB_PATH) as con:
+    """Actualiza la contraseña de un usuario y cierra sus sesiones abiertas"""
+    with get_pool(USER_DB_PATH).connection(write=True) as con:
         con.execute(
             "UPDATE usuarios SET password = ? WHERE email = ?",
             (new_password, email)
         )
-        con.commit()
-        return True
+        con.execute("DELETE FROM sesiones WHERE email = ?", (email,))
+    _session_email.clear()
+    return True
+
+# =========================
+# Sesiones persistentes
+# =========================
+SESSION_PARAM = "sesion"  # Query param que lleva el token entre recargas
+SESSION_TTL_S = 12 * 3600
+SESSION_CACHE_TTL_S = 60  # Tiempo que una sesión ya validada se sirve desde memoria
+SESSION_KEY_FILE = Path(".clave_sesion")
+
+@st.cache_resource
+def session_key():
+    """Clave HMAC de los tokens: SEGUIMIENTO_CLAVE_SESION o un archivo local"""
+    env = os.environ.get("SEGUIMIENTO_CLAVE_SESION")
+    if env:
+        return env.encode()
+    try:
+        fd = os.open(SESSION_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return SESSION_KEY_FILE.read_bytes()
+    key = secrets.token_bytes(32)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+def _sign(payload):
+    digest = hmac.new(session_key(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+def _token_hash(session_id):
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+@timed()
+def create_session(email, ttl=SESSION_TTL_S):
+    """Registra una sesión y devuelve su token firmado (id.expira.firma)"""
+    session_id = secrets.token_urlsafe(24)
+    now = int(time.time())
+    expires = now + ttl
+    with get_pool(USER_DB_PATH).connection(write=True) as con:
+        con.execute("DELETE FROM sesiones WHERE expires_at <= ?", (now,))
+        con.execute(
+            "INSERT INTO sesiones (token_hash, email, created_at, expires_at) VALUES (?, ?, ?, ?)",
+            (_token_hash(session_id), email, now, expires)
+        )
+    payload = f"{session_id}.{expires}"
+    return f"{payload}.{_sign(payload)}"
+
+def parse_session_token(token):
+    """Identificador de un token bien firmado y vigente, o None.
+
+    Los tokens falsos o expirados se descartan sin consultar la base.
+    """
+    try:
+        session_id, expires, signature = token.split(".")
+        expires = int(expires)
+    except (AttributeError, ValueError):
+        return None
+    # En bytes: compare_digest no acepta str con caracteres fuera de ASCII
+    expected = _sign(f"{session_id}.{expires}").encode()
+    if expires <= time.time() or not hmac.compare_digest(signature.encode(), expected):
+        return None
+    return session_id
+
+@st.cache_data(ttl=SESSION_CACHE_TTL_S, max_entries=256, show_spinner=False)
+def _session_email(token_hash):
+    with get_pool(USER_DB_PATH).connection() as con:
+        row = con.execute(
+            "SELECT email FROM sesiones WHERE token_hash = ? AND expires_at > ?",
+            (token_hash, int(time.time()))
+        ).fetchone()
+    return row[0] if row else None
+
+@timed()
+def restore_session(token):
+    """Email de la sesión del token, o None si no es válida"""
+    session_id = parse_session_token(token)
+    return _session_email(_token_hash(session_id)) if session_id else None
+
+def end_session(token):
+    """Revoca la sesión del token, si la hay"""
+    session_id = parse_session_token(token)
+    if session_id is None:
+        return
+    token_hash = _token_hash(session_id)
+    with get_pool(USER_DB_PATH).connection(write=True) as con:
+        con.execute("DELETE FROM sesiones WHERE token_hash = ?", (token_hash,))
+    _session_email.clear(token_hash)
 
 # =========================
 # Sistema de autenticación
@@ -82,14 +205,65 @@ def generate_temp_password(length=8):
     alphabet = string.ascii_letters + string.digits
     return ''.join(secrets.choice(alphabet) for i in range(length))
 
+LOGIN_MAX_ATTEMPTS = 5  # Intentos por correo dentro de la ventana
+LOGIN_WINDOW_S = 300
+LOGIN_LIMITER_MAX_KEYS = 10_000  # Sobre esto se descartan las ventanas vencidas
+
+class RateLimiter:
+    """Ventana deslizante de intentos por clave, en memoria del proceso"""
+
+    def __init__(self, max_attempts=LOGIN_MAX_ATTEMPTS, window_s=LOGIN_WINDOW_S):
+        self.max_attempts = max_attempts
+        self.window_s = window_s
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """Registra un intento; devuelve los segundos de espera si se superó el límite, o 0"""
+        now = time.monotonic()
+        start = now - self.window_s
+        with self._lock:
+            if len(self._attempts) > LOGIN_LIMITER_MAX_KEYS:
+                self._attempts = {k: a for k, a in self._attempts.items() if a and a[-1] > start}
+            attempts = self._attempts.setdefault(key, deque())
+            while attempts and attempts[0] <= start:
+                attempts.popleft()
+            if len(attempts) >= self.max_attempts:
+                return attempts[0] - start
+            attempts.append(now)
+            return 0
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+@st.cache_resource
+def login_limiter():
+    """Limitador compartido por las pestañas de acceso, uno por proceso"""
+    return RateLimiter()
+
+def throttled(email):
+    """Cuenta un intento para email; si superó el límite muestra el aviso y devuelve True"""
+    wait = login_limiter().hit(email.strip().lower())
+    if wait:
+        st.error(f"❌ Demasiados intentos. Intente nuevamente en {int(wait) + 1} segundos.")
+    return bool(wait)
+
 def check_authentication():
     if 'authenticated' not in st.session_state:
         st.session_state.authenticated = False
         st.session_state.current_user = None
     
     if not st.session_state.authenticated:
-        # Inicializar base de datos de usuarios
-        init_user_db()
+        # Inicializar base de datos de usuarios (una vez por proceso)
+        init_user_db_once(str(USER_DB_PATH.resolve()))
+
+        # Una recarga o pestaña nueva con un token válido no pasa por el login
+        email = restore_session(st.query_params.get(SESSION_PARAM))
+        if email:
+            st.session_state.authenticated = True
+            st.session_state.current_user = email
+            return
         
         # Mostrar formulario de login en 5 columnas → todo en la central
         col1, col2, col_center, col4, col5 = st.columns([1,1,2,1,1])
@@ -102,11 +276,13 @@ def check_authentication():
                 email = st.text_input("Correo electrónico", key="login_email")
                 password = st.text_input("Contraseña", type="password", key="login_password")
                 
-                if st.button("Ingresar", key="login_btn", use_container_width=True):
+                if st.button("Ingresar", key="login_btn", width="stretch") and not throttled(email):
                     user = get_user(email)
                     if user and password == user["password"]:
+                        login_limiter().reset(email.strip().lower())
                         st.session_state.authenticated = True
                         st.session_state.current_user = email
+                        st.query_params[SESSION_PARAM] = create_session(email)
                         st.success("✅ Credenciales correctas. Redirigiendo...")
                         st.rerun()
                     else:
@@ -117,7 +293,7 @@ def check_authentication():
                 recovery_email = st.text_input("Correo electrónico", key="recovery_email")
                 secret_word = st.text_input("Palabra secreta", type="password", key="secret_word")
                 
-                if st.button("Generar Clave Temporal", key="recover_btn", use_container_width=True):
+                if st.button("Generar Clave Temporal", key="recover_btn", width="stretch") and not throttled(recovery_email):
                     user = get_user(recovery_email)
                     if user and secret_word == user["secret_word"]:
                         temp_password = generate_temp_password()
@@ -134,7 +310,7 @@ def check_authentication():
                 new_password = st.text_input("Nueva contraseña", type="password", key="new_password")
                 confirm_password = st.text_input("Confirmar nueva contraseña", type="password", key="confirm_password")
                 
-                if st.button("Cambiar Contraseña", key="change_btn", use_container_width=True):
+                if st.button("Cambiar Contraseña", key="change_btn", width="stretch") and not throttled(change_email):
                     user = get_user(change_email)
                     if not user:
                         st.error("❌ Correo electrónico no válido")
@@ -148,8 +324,16 @@ def check_authentication():
         
         st.stop()  # Detener la ejecución hasta que se autentique
 
-# Verificar autenticación
-check_authentication()
+def session_controls():
+    """Usuario actual y botón para cerrar la sesión persistente"""
+    _, col_user = st.columns([6, 1])
+    with col_user:
+        if st.button("Cerrar sesión", key="logout_btn", type="tertiary", help=st.session_state.get("current_user")):
+            end_session(st.query_params.get(SESSION_PARAM))
+            st.query_params.pop(SESSION_PARAM, None)
+            st.session_state.authenticated = False
+            st.session_state.current_user = None
+            st.rerun()
 
 # =========================
 # VARIABLES DE COLOR
@@ -166,196 +350,163 @@ BTN_SECONDARY_BG = "#0F69B4"
 BTN_SECONDARY_TEXT = "#ffffff"  
 BTN_SECONDARY_HOVER = "#DDEFFB"
 
-DB_PATH = Path("seguimiento_regional.db")
-TABLE = "registros"
-EXCEL_FILE = "registros.xlsx"  # Archivo fijo para importación
-
-REGIONES = [
-    "Arica y Parinacota", "Tarapacá", "Antofagasta", "Atacama", "Coquimbo",
-    "Valparaíso", "Metropolitana", "O'Higgins", "Maule", "Ñuble",
-    "Biobío", "La Araucanía", "Los Ríos", "Los Lagos", "Aysén", "Magallanes"
-]
-
-ITEMS_MONITOREO = [
-    "Indicadores de desempeño","Ejecución Presupuestaria","Clima Laboral", "Infraestructura",
-    "Plan de SSPP", "Político Institucional",
-    "Temas Dpto. Personas", "Informática", "Otros"
-]
-
-ESTADOS = ["Pendiente", "En progreso", "Completado", "Cancelado"]
+RECORDS_CACHE_ENTRIES = 4  # Versiones de la tabla que se mantienen en memoria
 
 # =========================
-# CONVERTIR IMAGEN LOCAL A BASE64
+# Logo servido como archivo estático (ver .streamlit/config.toml)
 # =========================
-def image_to_base64(path):
-    try:
-        with open(path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    except FileNotFoundError:
-        st.error(f"Archivo de imagen no encontrado: {path}")
-        return None
-
-# Cargar imagen
+STATIC_DIR = Path(__file__).resolve().parent / "static"
 IMAGEN_LOCAL = "LOGO-PROPIO-ISL-2023-CMYK-01.png"
-img_base64 = image_to_base64(IMAGEN_LOCAL)
-img_src = f"data:image/png;base64,{img_base64}" if img_base64 else None
 
 # =========================
-# Funciones de la base de datos
+# Base de datos con caché por versión
 # =========================
-def init_db():
-    with sqlite3.connect(DB_PATH) as con:
-        con.execute(f"""
-            CREATE TABLE IF NOT EXISTS {TABLE}(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                direccion_regional TEXT NOT NULL,
-                item_monitoreo TEXT NOT NULL,
-                detalle TEXT NOT NULL,
-                estado TEXT,
-                plazo_dias INTEGER,
-                fecha_reunion TEXT
-            );
-        """)
-        con.commit()
+# La lógica vive en storage.py; aquí solo se agrega la caché de Streamlit.
+# Cada lectura se indexa por la versión de la tabla, que cambia con cada
+# escritura, así ninguna sesión ve datos viejos.
+@st.cache_resource
+def init_db_once(db_path):
+    """Ejecuta init_db una sola vez por proceso y base de datos"""
+    init_db()
+    return True
 
-def delete_record(record_id):
-    with sqlite3.connect(DB_PATH) as con:
-        con.execute(f"DELETE FROM {TABLE} WHERE id = ?", (record_id,))
-        con.commit()
+@st.cache_resource(max_entries=1)
+def _purge_deleted_daily(day):
+    # Se ejecuta una vez por proceso y por día: cambiar el argumento invalida la caché
+    purge_history()
+    return purge_deleted_records()
 
-def get_record(record_id):
-    """Obtiene un registro específico por ID"""
-    with sqlite3.connect(DB_PATH) as con:
-        cur = con.execute(f"SELECT * FROM {TABLE} WHERE id = ?", (record_id,))
-        result = cur.fetchone()
-        if result:
-            return {
-                "id": result[0],
-                "direccion_regional": result[1],
-                "item_monitoreo": result[2],
-                "detalle": result[3],
-                "estado": result[4],
-                "plazo_dias": result[5],
-                "fecha_reunion": result[6]
-            }
-        return None
+@timed()
+def get_count():
+    return _load_count(str(DB_PATH), get_table_version())
 
-def update_record(record_id, reg):
-    """Actualiza un registro existente"""
-    with sqlite3.connect(DB_PATH) as con:
-        con.execute(f"""
-            UPDATE {TABLE} 
-            SET direccion_regional = ?, item_monitoreo = ?, detalle = ?, 
-                estado = ?, plazo_dias = ?, fecha_reunion = ?
-            WHERE id = ?
-        """, (
-            reg["direccion_regional"], reg["item_monitoreo"], reg["detalle"],
-            reg["estado"], reg["plazo_dias"], reg["fecha_reunion"], record_id
-        ))
-        con.commit()
-        return True
+@st.cache_data(max_entries=RECORDS_CACHE_ENTRIES, show_spinner=False)
+def _load_count(db_path, version):
+    return load_count(db_path)
 
-def get_count():
-    with sqlite3.connect(DB_PATH) as con:
-        cur = con.execute(f"SELECT COUNT(*) FROM {TABLE}")
-        return int(cur.fetchone()[0])
-
-def insert_record(reg):
-    with sqlite3.connect(DB_PATH) as con:
-        cur = con.execute(f"""
-            INSERT INTO {TABLE}
-            (direccion_regional, item_monitoreo, detalle, estado, plazo_dias, fecha_reunion)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            reg["direccion_regional"], reg["item_monitoreo"], reg["detalle"],
-            reg["estado"], reg["plazo_dias"], reg["fecha_reunion"]
-        ))
-        con.commit()
-        return cur.lastrowid
+SUMMARY_CACHE_ENTRIES = 4
 
+@timed()
+def get_summary():
+    """Conteos por dimensión desde la tabla de resumen (ver storage.load_summary)"""
+    return _load_summary(str(DB_PATH), get_table_version())
+
+@st.cache_data(max_entries=SUMMARY_CACHE_ENTRIES, show_spinner=False)
+def _load_summary(db_path, version):
+    return load_summary(db_path)
+
+DUE_CACHE_ENTRIES = 16
+
+@timed()
+def get_due_records(region=None, days_ahead=DUE_SOON_DAYS, today=None, limit=DUE_LIMIT):
+    """Compromisos abiertos vencidos o por vencer (ver storage.load_due_records)"""
+    today = today or date.today()
+    return _load_due_records(str(DB_PATH), get_table_version(), region, days_ahead, today, limit)
+
+@st.cache_data(max_entries=DUE_CACHE_ENTRIES, show_spinner=False)
+def _load_due_records(db_path, version, region, days_ahead, today, limit):
+    return load_due_records(db_path, region, days_ahead, today, limit)
+
+@timed()
+def count_due_by_region(days_ahead=DUE_SOON_DAYS, today=None):
+    """Cantidad de compromisos vencidos y por vencer en cada Dirección Regional"""
+    today = today or date.today()
+    return _load_due_counts(str(DB_PATH), get_table_version(), days_ahead, today)
+
+@st.cache_data(max_entries=DUE_CACHE_ENTRIES, show_spinner=False)
+def _load_due_counts(db_path, version, days_ahead, today):
+    return load_due_counts(db_path, days_ahead, today)
+
+@timed()
 def get_all_records():
-    with sqlite3.connect(DB_PATH) as con:
-        df = pd.read_sql_query(f"""
-            SELECT
-                id,
-                direccion_regional AS "Dirección Regional",
-                item_monitoreo AS "Ítem Monitoreo",
-                detalle AS "Detalle",
-                estado AS "Estado",
-                plazo_dias AS "Plazo (días)",
-                strftime('%d-%m-%Y', fecha_reunion) AS "Fecha Reunión"
-            FROM {TABLE}
-            ORDER BY id ASC
-        """, con)
-    df.insert(0, " ", False)
-    return df
-
-def export_to_excel():
-    """Exporta todos los registros a un archivo Excel fijo"""
-    df = get_all_records().drop(columns=[" "])
-    df.to_excel(EXCEL_FILE, index=False)
-    return True
+    """Todos los registros; se reutiliza el resultado mientras la tabla no cambie"""
+    return _load_all_records(str(DB_PATH), get_table_version())
 
-def import_from_fixed_excel():
-    """Importa registros desde el archivo Excel fijo"""
-    try:
-        if not os.path.exists(EXCEL_FILE):
-            return False, f"Archivo {EXCEL_FILE} no encontrado"
-        
-        df = pd.read_excel(EXCEL_FILE)
-
-        rename_map = {
-            "N° Registro": "id",
-            "Dirección Regional": "direccion_regional",
-            "Ítem Monitoreo": "item_monitoreo",
-            "Detalle": "detalle",
-            "Estado": "estado",
-            "Plazo (días)": "plazo_dias",
-            "Fecha Reunión": "fecha_reunion"
-        }
-        df = df.rename(columns=rename_map)
-
-        with sqlite3.connect(DB_PATH) as con:
-            con.execute(f"DROP TABLE IF EXISTS {TABLE}")
-            con.commit()
-        init_db()
-
-        with sqlite3.connect(DB_PATH) as con:
-            for _, row in df.iterrows():
-                plazo = row.get("plazo_dias", 0)
-                plazo = 0 if pd.isna(plazo) else int(plazo)
-
-                fecha_reunion = row.get("fecha_reunion", None)
-                if pd.isna(fecha_reunion) or fecha_reunion is None:
-                    fecha_reunion = date.today().strftime("%Y-%m-%d")
-                else:
-                    # Especificar explícitamente el formato de fecha
-                    fecha_reunion = pd.to_datetime(
-                        fecha_reunion, 
-                        format='%d-%m-%Y'  # Especificar formato día-mes-año
-                    ).strftime("%Y-%m-%d")
-
-                con.execute(f"""
-                    INSERT INTO {TABLE} (direccion_regional, item_monitoreo, detalle, estado, plazo_dias, fecha_reunion)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    row.get("direccion_regional", ""),
-                    row.get("item_monitoreo", ""),
-                    str(row.get("detalle", "")),
-                    row.get("estado", ""),
-                    plazo,
-                    fecha_reunion
-                ))
-            con.commit()
-        
-        return True, "Registros importados correctamente"
-    except Exception as e:
-        return False, f"Error al importar: {str(e)}"
+@st.cache_data(max_entries=RECORDS_CACHE_ENTRIES, show_spinner=False)
+def _load_all_records(db_path, version):
+    return load_all_records(db_path)
+
+PAGE_CACHE_ENTRIES = 32
+
+@timed()
+def query_records(filters=None, sort_by="id", descending=False, page=1, page_size=PAGE_SIZES[1]):
+    """Una página de registros filtrada y ordenada en SQLite.
+
+    filters admite listas para direccion_regional, item_monitoreo y estado,
+    y fechas para fecha_desde/fecha_hasta. Devuelve (df, total_filtrado).
+    """
+    if sort_by not in SORT_COLUMNS.values():
+        raise ValueError(f"Columna de orden no válida: {sort_by}")
+    filters = filters or {}
+    version = get_table_version()
+    df = _load_records_page(str(DB_PATH), version, filters, sort_by, descending, page, page_size)
+    return df, _load_filtered_count(str(DB_PATH), version, filters)
+
+@timed()
+def count_records(filters=None):
+    """Cantidad de registros que cumplen los filtros"""
+    return _load_filtered_count(str(DB_PATH), get_table_version(), filters or {})
+
+@st.cache_data(max_entries=PAGE_CACHE_ENTRIES, show_spinner=False)
+def _load_filtered_count(db_path, version, filters):
+    return load_filtered_count(db_path, filters)
+
+@st.cache_data(max_entries=PAGE_CACHE_ENTRIES, show_spinner=False)
+def _load_records_page(db_path, version, filters, sort_by, descending, page, page_size):
+    return load_records_page(db_path, filters, sort_by, descending, page, page_size)
+
+@timed()
+def get_partitions():
+    """Años archivados en bases de solo lectura (ver storage.archive_year)"""
+    return _load_partitions(str(DB_PATH), get_table_version())
+
+@st.cache_data(max_entries=SUMMARY_CACHE_ENTRIES, show_spinner=False)
+def _load_partitions(db_path, version):
+    return list_partitions(db_path)
+
+SEARCH_CACHE_ENTRIES = 16
+
+@timed()
+def search_records(text, limit=SEARCH_LIMIT):
+    """Busca en las observaciones; resultados ordenados por relevancia (bm25)"""
+    query = fts_query(text)
+    if not query:
+        return pd.DataFrame(columns=SEARCH_COLUMNS)
+    return _load_search(str(DB_PATH), get_table_version(), query, limit)
+
+@st.cache_data(max_entries=SEARCH_CACHE_ENTRIES, show_spinner=False)
+def _load_search(db_path, version, query, limit):
+    return load_search(db_path, query, limit)
+
+HISTORY_CACHE_ENTRIES = 16
+
+@timed()
+def get_history(record_id):
+    """Historial de un registro, en caché por versión de la tabla"""
+    return _load_history(str(DB_PATH), get_table_version(), record_id)
+
+@st.cache_data(max_entries=HISTORY_CACHE_ENTRIES, show_spinner=False)
+def _load_history(db_path, version, record_id):
+    return load_history(db_path, record_id)
+
+EXPORT_CACHE_ENTRIES = 4  # Unas pocas combinaciones de versión y formato
+
+@timed()
+def build_export(fmt="xlsx"):
+    """Bytes del archivo de exportación; se generan bajo demanda y por versión"""
+    return _build_export_bytes(str(DB_PATH), get_table_version(), fmt)
+
+@st.cache_data(max_entries=EXPORT_CACHE_ENTRIES, show_spinner=False)
+def _build_export_bytes(db_path, version, fmt):
+    return build_export_bytes(db_path, fmt)
 
 # =========================
 # Estilos CSS (mejorados)
 # =========================
-st.markdown(f"""
+@st.cache_resource
+def page_styles():
+    """Bloque de estilos de la página, armado una vez por proceso"""
+    return f"""
 <style>
 .stApp {{
     background: {BG};
@@ -575,58 +726,200 @@ div[data-testid="stButton"] button[kind="primary"]:hover {{
     color: white;
 }}
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # =========================
 # Encabezado con logo
 # =========================
-if img_src:
-    st.markdown(f"""
+@st.cache_resource
+def header_html():
+    """Encabezado con el logo como URL estática en vez de un data URI"""
+    if (STATIC_DIR / IMAGEN_LOCAL).exists():
+        return f"""
     <div class="header-container">
         <div class="header-logo">
-            <img src="{img_src}" alt="Logo">
+            <img src="app/static/{IMAGEN_LOCAL}" alt="Logo">
         </div>
         <div class="header-subtitle">Coordinación Territorial</div>
-        <div class="header-title">SEGUIMIENTO REGIONAL 2025</div>
+        <div class="header-title">{PAGE_TITLE}</div>
     </div>
-    """, unsafe_allow_html=True)
-else:
+    """
     # Fallback al diseño original si no hay imagen
-    st.markdown(f"""
+    return f"""
     <div class="topbar">
         <div class="logo">
             ISL
             <small>Coordinación Territorial</small>
         </div>
-        <div class="title">SEGUIMIENTO REGIONAL 2025</div>
+        <div class="title">{PAGE_TITLE}</div>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+@st.cache_resource
+def ensure_excel_file(excel_path):
+    """Exportar inicialmente si no existe el archivo (una vez por proceso)"""
+    if not os.path.exists(excel_path):
+        export_to_excel()
+    return True
 
-init_db()
+# =========================
+# Paneles
+# =========================
+# Cada panel es un fragmento: interactuar con uno solo re-ejecuta ese panel.
+# Los paneles se comunican únicamente a través de st.session_state (claves
+# de los widgets del formulario y FORM_PENDING_KEY); tras una escritura
+# confirmada se pide un rerun completo de la app.
+FORM_PENDING_KEY = "form_pending"
 
-# Exportar inicialmente si no existe el archivo
-if not os.path.exists(EXCEL_FILE):
-    export_to_excel()
+def form_defaults():
+    """Valores iniciales del formulario y de las observaciones"""
+    return {
+        "dr": "Magallanes",
+        "im": ITEMS_MONITOREO[0],
+        "est": ESTADOS[0],
+        "plz": 0,
+        "fec": date.today(),
+        "detalle": "",
+    }
 
-# Inicializar variables de sesión para edición
-if 'editing_id' not in st.session_state:
+def record_to_form(record):
+    """Valores de los widgets del formulario para un registro guardado"""
+    return {
+        "dr": record["direccion_regional"],
+        "im": record["item_monitoreo"],
+        "est": record["estado"] if record["estado"] in ESTADOS else ESTADOS[0],
+        "plz": record["plazo_dias"] or 0,
+        "fec": pd.to_datetime(record["fecha_reunion"]).date(),
+        "detalle": record["detalle"],
+    }
+
+def form_to_record():
+    """Registro a guardar a partir de los widgets del formulario"""
+    return {
+        "direccion_regional": st.session_state.dr,
+        "item_monitoreo": st.session_state.im,
+        "detalle": st.session_state.detalle.strip(),
+        "estado": st.session_state.est.strip(),
+        "plazo_dias": int(st.session_state.plz) if st.session_state.plz else 0,
+        "fecha_reunion": st.session_state.fec.strftime("%Y-%m-%d"),
+    }
+
+def as_saved(record):
+    """record con los mismos ajustes que aplica el formulario al guardar"""
+    form = record_to_form(record)
+    return {
+        "direccion_regional": form["dr"],
+        "item_monitoreo": form["im"],
+        "detalle": form["detalle"].strip(),
+        "estado": form["est"],
+        "plazo_dias": int(form["plz"]),
+        "fecha_reunion": form["fec"].strftime("%Y-%m-%d"),
+    }
+
+FIELD_LABELS = {
+    "direccion_regional": "Dirección Regional",
+    "item_monitoreo": "Ítem Monitoreo",
+    "detalle": "Detalle",
+    "estado": "Estado",
+    "plazo_dias": "Plazo (días)",
+    "fecha_reunion": "Fecha Reunión",
+}
+
+def start_editing(record):
+    """Carga record en el formulario y guarda la versión leída para detectar conflictos"""
+    st.session_state.record_to_edit = record["id"]
+    st.session_state.record_base = record
+    st.session_state.is_editing = True
+    st.session_state[FORM_PENDING_KEY] = record_to_form(record)
+
+def stop_editing():
     st.session_state.editing_id = None
-if 'is_editing' not in st.session_state:
     st.session_state.is_editing = False
-if 'record_to_edit' not in st.session_state:
     st.session_state.record_to_edit = None
+    st.session_state.record_base = None
+    st.session_state.edit_conflict = None
 
-# =========================
-# Layout principal
-# =========================
-col_left, col_middle, col_right = st.columns([0.4, 0.6, 1.0], gap="large")
+def clear_selection():
+    """Vacía la selección y cambia la clave de la grilla para descartar sus posiciones guardadas"""
+    st.session_state.selected_ids = set()
+    st.session_state.grid_epoch = st.session_state.get("grid_epoch", 0) + 1
 
-# Obtener el registro a editar si existe
-record_to_edit = None
-if st.session_state.record_to_edit:
-    record_to_edit = get_record(st.session_state.record_to_edit)
+def conflict_prompt():
+    """Aviso de edición concurrente con opciones para recargar o combinar"""
+    conflict = st.session_state.edit_conflict
+    mine, current = conflict["mine"], conflict["current"]
+    record_id = st.session_state.record_to_edit
+    if current is None:
+        st.error(f"El registro #{record_id} fue eliminado mientras lo editabas; tus cambios no se guardaron.")
+        if st.button("Cerrar", key="conflict_close_btn"):
+            stop_editing()
+            st.rerun()
+        return
 
-with col_left:
+    # Se compara lo que guardaría el formulario, no los valores crudos de la base
+    base, theirs = as_saved(st.session_state.record_base), as_saved(current)
+    merged, conflicts = merge_records(base, mine, theirs)
+    st.warning(
+        f"Otra persona modificó el registro #{record_id} mientras lo editabas; tus cambios no se guardaron. "
+        + (f"Ambos cambiaron: {', '.join(FIELD_LABELS[f] for f in conflicts)}." if conflicts else "Los cambios no se superponen.")
+    )
+    changed = [f for f in FIELD_LABELS if base[f] != mine[f] or base[f] != theirs[f]]
+    st.dataframe(
+        pd.DataFrame(
+            {
+                "Campo": [FIELD_LABELS[f] for f in changed],
+                "Al cargar": [str(base[f]) for f in changed],
+                "Tu versión": [str(mine[f]) for f in changed],
+                "Versión actual": [str(theirs[f]) for f in changed],
+            }
+        ),
+        hide_index=True,
+        width="stretch"
+    )
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        if st.button("Combinar cambios", key="conflict_merge_btn", type="primary", width="stretch",
+                     help="Lleva al formulario la versión actual con tus cambios; en los campos que ambos cambiaron se conserva el tuyo"):
+            start_editing(current)
+            st.session_state[FORM_PENDING_KEY] = record_to_form({**current, **merged})
+            st.session_state.edit_conflict = None
+            st.rerun()
+    with c2:
+        if st.button("Recargar versión actual", key="conflict_reload_btn", width="stretch",
+                     help="Descarta tus cambios y carga el registro tal como está ahora"):
+            start_editing(current)
+            st.session_state.edit_conflict = None
+            st.rerun()
+    with c3:
+        if st.button("Cancelar edición", key="conflict_cancel_btn", width="stretch"):
+            stop_editing()
+            st.rerun()
+
+def init_session_state():
+    # Inicializar variables de sesión para edición
+    if 'editing_id' not in st.session_state:
+        st.session_state.editing_id = None
+    if 'is_editing' not in st.session_state:
+        st.session_state.is_editing = False
+    if 'record_to_edit' not in st.session_state:
+        st.session_state.record_to_edit = None
+    if "record_base" not in st.session_state:
+        st.session_state.record_base = None  # Registro tal como se cargó para editar
+    if "edit_conflict" not in st.session_state:
+        st.session_state.edit_conflict = None
+    if "selected_ids" not in st.session_state:
+        st.session_state.selected_ids = set()
+
+    # Traspaso explícito hacia el formulario (p. ej. tras "Modificar"); se
+    # aplica antes de crear los widgets para que tomen los nuevos valores
+    pending = st.session_state.pop(FORM_PENDING_KEY, None)
+    for key, value in {**form_defaults(), **(pending or {})}.items():
+        if pending or key not in st.session_state:
+            st.session_state[key] = value
+
+@st.fragment
+@timed("fragmento.registro")
+def registro_panel():
     st.markdown('<div class="section-title">Registro de datos</div>', unsafe_allow_html=True)
     st.markdown('<div class="form-container">', unsafe_allow_html=True)
     
@@ -639,195 +932,525 @@ with col_left:
     """, unsafe_allow_html=True)
 
     st.markdown('<div class="form-row"><div class="form-label">Dirección Regional:</div></div>', unsafe_allow_html=True)
-    
-    # Determinar el valor inicial basado en si estamos editando
-    default_dr_index = REGIONES.index("Magallanes")
-    if record_to_edit:
-        default_dr_index = REGIONES.index(record_to_edit["direccion_regional"])
-    
-    direccion = st.selectbox("Dirección Regional", REGIONES, index=default_dr_index, label_visibility="collapsed", key="dr")
+    st.selectbox("Dirección Regional", REGIONES, label_visibility="collapsed", key="dr")
 
     st.markdown('<div class="form-row"><div class="form-label">Ítem Monitoreo:</div></div>', unsafe_allow_html=True)
-    
-    # Determinar el valor inicial basado en si estamos editando
-    default_im_index = 0
-    if record_to_edit:
-        default_im_index = ITEMS_MONITOREO.index(record_to_edit["item_monitoreo"])
-    
-    item = st.selectbox("Ítem Monitoreo", ITEMS_MONITOREO, index=default_im_index, label_visibility="collapsed", key="im")
+    st.selectbox("Ítem Monitoreo", ITEMS_MONITOREO, label_visibility="collapsed", key="im")
 
     st.markdown('<div class="form-row"><div class="form-label">Estado:</div></div>', unsafe_allow_html=True)
-    
-    # Determinar el valor inicial basado en si estamos editando
-    default_est_index = 0
-    if record_to_edit:
-        default_est_index = ESTADOS.index(record_to_edit["estado"])
-    
-    estado = st.selectbox("Estado", ESTADOS, index=default_est_index, label_visibility="collapsed", key="est")
+    st.selectbox("Estado", ESTADOS, label_visibility="collapsed", key="est")
 
     st.markdown('<div class="form-row"><div class="form-label">Plazo (Días):</div></div>', unsafe_allow_html=True)
-    
-    # Determinar el valor inicial basado en si estamos editando
-    default_plz = 0
-    if record_to_edit:
-        default_plz = record_to_edit["plazo_dias"]
-    
-    plazo = st.number_input("Plazo (Días)", min_value=0, step=1, value=default_plz, format="%d", label_visibility="collapsed", key="plz")
+    st.number_input("Plazo (Días)", min_value=0, step=1, format="%d", label_visibility="collapsed", key="plz")
 
     st.markdown('<div class="form-row"><div class="form-label">Fecha Reunión:</div></div>', unsafe_allow_html=True)
-    
-    # Determinar el valor inicial basado en si estamos editando
-    default_fec = date.today()
-    if record_to_edit:
-        default_fec = pd.to_datetime(record_to_edit["fecha_reunion"]).date()
-    
-    fecha = st.date_input("Fecha Reunión", value=default_fec, format="DD-MM-YYYY", label_visibility="collapsed", key="fec")
+    st.date_input("Fecha Reunión", format="DD-MM-YYYY", label_visibility="collapsed", key="fec")
     
     st.markdown('</div>', unsafe_allow_html=True)
 
-with col_middle:
+@st.fragment
+@timed("fragmento.observaciones")
+def observaciones_panel():
     st.markdown('<div class="section-title">Observaciones</div>', unsafe_allow_html=True)
-    
-    # Determinar el valor inicial basado en si estamos editando
-    default_detalle = ""
-    if record_to_edit:
-        default_detalle = record_to_edit["detalle"]
-    
-    detalle = st.text_area("Observaciones", value=default_detalle, key="detalle", label_visibility="collapsed", height=500)
+    st.text_area("Observaciones", key="detalle", label_visibility="collapsed", height=500)
 
-with col_right:
+@st.fragment
+@timed("fragmento.registros")
+def registros_panel():
     st.markdown('<div class="section-title">Registros guardados</div>', unsafe_allow_html=True)
-    df_all = get_all_records()
-    
-    edited_df = st.data_editor(
-        df_all,
-        use_container_width=True,
+
+    busqueda = st.text_input(
+        "Buscar en observaciones", key="busqueda", placeholder="🔍 Buscar en observaciones…",
+        label_visibility="collapsed"
+    )
+    if busqueda.strip():
+        resultados = search_records(busqueda)
+        if resultados.empty:
+            st.caption("Sin resultados")
+        else:
+            st.caption(f"{len(resultados)} resultado(s) más relevantes")
+            with st.container(height=220):
+                for res in resultados.itertuples(index=False):
+                    st.markdown(
+                        f"**#{res.id}** · {html.escape(res[1])} · {html.escape(res[2])} · "
+                        f"{res[3] or '—'} · {res[4]}<br><small>{highlight_snippet(res.snippet)}</small>",
+                        unsafe_allow_html=True
+                    )
+
+    with st.expander("Filtros y orden"):
+        f1, f2 = st.columns(2)
+        with f1:
+            filtro_dr = st.multiselect("Dirección Regional", REGIONES, key="f_dr")
+            filtro_est = st.multiselect("Estado", ESTADOS, key="f_est")
+            orden = st.selectbox("Ordenar por", list(SORT_COLUMNS), key="f_orden")
+        with f2:
+            filtro_im = st.multiselect("Ítem Monitoreo", ITEMS_MONITOREO, key="f_im")
+            filtro_fec = st.date_input("Fecha Reunión (rango)", value=(), format="DD-MM-YYYY", key="f_fec")
+            descendente = st.toggle("Orden descendente", key="f_desc")
+
+    filters = {
+        "direccion_regional": filtro_dr,
+        "item_monitoreo": filtro_im,
+        "estado": filtro_est,
+    }
+    if len(filtro_fec) == 2:
+        filters["fecha_desde"], filters["fecha_hasta"] = filtro_fec
+
+    # Los años archivados solo se leen cuando el rango de fechas los alcanza
+    archived = [p["anio"] for p in get_partitions()]
+    if archived and len(filtro_fec) == 2:
+        in_range = [year for year in archived if filtro_fec[0].year <= year <= filtro_fec[1].year]
+        if in_range:
+            st.caption(f"Incluye registros archivados de {', '.join(map(str, in_range))} (solo lectura)")
+    elif archived:
+        st.caption(f"Años archivados: {', '.join(map(str, archived))}. Filtra por fecha para consultarlos.")
+
+    p1, p2, p3 = st.columns([1, 1, 2])
+    with p1:
+        page_size = st.selectbox("Filas por página", PAGE_SIZES, index=1, key="page_size")
+    total_filtrados = count_records(filters)
+    total_pages = max(1, -(-total_filtrados // page_size))
+    if st.session_state.get("page", 1) > total_pages:
+        st.session_state.page = total_pages
+    with p2:
+        page = st.number_input("Página", min_value=1, max_value=total_pages, step=1, key="page")
+    with p3:
+        st.caption(f"{total_filtrados} registro(s) · página {page} de {total_pages}")
+
+    df_page, _ = query_records(filters, SORT_COLUMNS[orden], descendente, page, page_size)
+
+    # La selección se guarda por id para que sobreviva a cambios de página.
+    # La grilla solo devuelve posiciones de fila: no hay columna extra ni copia editada del frame.
+    # La clave depende solo de filtros, orden y página, así una escritura de otra sesión no
+    # descarta el clic pendiente; las posiciones se traducen con los ids que se mostraron.
+    ids = df_page["id"].to_numpy()
+    # grid_epoch cambia cuando esta sesión borra, restaura o reimporta: las posiciones
+    # guardadas ya no valen y no deben traducirse a ids
+    epoch = st.session_state.get("grid_epoch", 0)
+    view = hash((repr(filters), orden, descendente, page, page_size, epoch))
+    shown = st.session_state.get("grid_shown")  # (vista, revisión, ids) del render anterior
+    revision = shown[1] if shown and shown[0] == view else 0
+    if shown and shown[0] == view and shown[2] != ids.tolist():
+        # Cambiaron las filas bajo la misma vista: las posiciones guardadas apuntan al frame
+        # anterior. Se pasan a ids con ese frame y la grilla se rehace con la selección por id
+        state = st.session_state.get(f"grid_{view}_{revision}")
+        if state is not None:
+            shown_ids = shown[2]
+            st.session_state.selected_ids = (st.session_state.selected_ids - set(shown_ids)) | {
+                shown_ids[i] for i in state["selection"]["rows"] if i < len(shown_ids)
+            }
+        revision += 1
+    st.session_state.grid_shown = (view, revision, ids.tolist())
+    preselected = [i for i, row_id in enumerate(ids) if row_id in st.session_state.selected_ids]
+    grid_key = f"grid_{view}_{revision}"
+    event = st.dataframe(
+        df_page,
+        width="stretch",
         height=500,
-        key="data_editor",
+        key=grid_key,
+        on_select="rerun",
+        selection_mode="multi-row",
+        selection_default={"selection": {"rows": preselected}},
         column_config={
-            " ": st.column_config.CheckboxColumn(
-                "Seleccionar",
-                help="Selecciona registros para eliminar",
-                default=False,
+            "id": None,
+            "Detalle": st.column_config.TextColumn(
+                "Detalle", help="Inicio del texto; selecciona un registro para verlo completo"
             ),
-            "id": None
         },
-        disabled=["Dirección Regional", "Ítem Monitoreo", "Detalle", "Estado", "Plazo (días)", "Fecha Reunión"],
         hide_index=True
     )
-    
-    selected_ids = edited_df[edited_df[" "]]["id"].tolist()
+
+    page_ids = set(ids.tolist())
+    st.session_state.selected_ids = (
+        (st.session_state.selected_ids - page_ids) | set(ids[event.selection.rows].tolist())
+    )
+    selected_ids = sorted(st.session_state.selected_ids)
+    if len(selected_ids) > len(page_ids & st.session_state.selected_ids):
+        st.caption(f"{len(selected_ids)} registro(s) seleccionado(s) en total")
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
-        # Botón de exportación
-        excel_buffer = io.BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine="openpyxl") as writer:
-            df_all.drop(columns=[" "]).to_excel(writer, index=False)
-        
+        # Botón de exportación: el archivo se genera solo al hacer clic
         st.markdown('<div class="col-button">', unsafe_allow_html=True)
-        st.download_button(
-            "Exportar Excel",
-            data=excel_buffer.getvalue(),
-            file_name=EXCEL_FILE,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            type="secondary"
-        )
+        with st.popover("Exportar", width="stretch"):
+            fmt = st.selectbox(
+                "Formato",
+                available_export_formats(),
+                format_func=lambda f: EXPORT_FORMATS[f][0],
+                key="export_format",
+                help="CSV, Parquet y Arrow se generan mucho más rápido que Excel"
+            )
+            st.download_button(
+                f"Descargar {EXPORT_FORMATS[fmt][0]}",
+                data=lambda: build_export(fmt),
+                file_name=f"{Path(EXCEL_FILE).stem}.{fmt}",
+                mime=EXPORT_FORMATS[fmt][1],
+                type="secondary",
+                width="stretch"
+            )
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
-        # Botón de importación
+        # Importación: sincronizar solo las diferencias o reemplazar todo
         st.markdown('<div class="col-button">', unsafe_allow_html=True)
-        if st.button("Importar Excel", type="secondary", key="import_btn", use_container_width=True):
-            success, message = import_from_fixed_excel()
+        with st.popover("Importar", width="stretch"):
+            sync_clicked = st.button(
+                "Sincronizar Excel", type="primary", key="sync_btn", width="stretch",
+                help=f"Aplica solo las altas, cambios y eliminaciones de {EXCEL_FILE}, emparejando por N° Registro"
+            )
+            import_clicked = st.button(
+                "Importar Excel", type="secondary", key="import_btn", width="stretch",
+                help="Reemplaza todos los registros por los del archivo; los ids se reinician"
+            )
+        if sync_clicked or import_clicked:
+            progress_bar = st.progress(0.0, text="Leyendo archivo…")
+
+            def report_progress(done, total):
+                fraction = min(done / total, 1.0) if total else 0.0
+                progress_bar.progress(fraction, text=f"Leyendo archivo… {done} fila(s) leída(s)")
+
+            if sync_clicked:
+                success, message, rejected, changes = sync_from_fixed_excel(progress=report_progress)
+                st.session_state.pop("sync_rewrite_pending", None)
+                if success and changes["altas"] and rejected:
+                    # Reescribir el archivo perdería las filas rechazadas: se pide confirmación
+                    st.session_state.sync_rewrite_pending = changes["altas"]
+                elif success and changes["altas"]:
+                    export_to_excel()  # El archivo recibe los ids de las altas
+            else:
+                success, message, rejected = import_from_fixed_excel(progress=report_progress)
+            progress_bar.empty()
             if success:
-                st.success(message)
+                clear_selection()
+                st.session_state.import_report = {"message": message, "rejected": rejected}
                 st.rerun()
             else:
                 st.error(message)
+                if rejected:
+                    st.dataframe(pd.DataFrame(rejected), hide_index=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
     with col3:
         # Botón de registro
         st.markdown('<div class="col-button">', unsafe_allow_html=True)
-        submitted = st.button("Registrar", type="primary", use_container_width=True)
+        submitted = st.button("Registrar", type="primary", width="stretch")
         st.markdown('</div>', unsafe_allow_html=True)
 
     with col4:
         # Botón de modificación
         st.markdown('<div class="col-button">', unsafe_allow_html=True)
-        modify_clicked = st.button("Modificar", type="secondary", use_container_width=True)
+        modify_clicked = st.button("Modificar", type="secondary", width="stretch")
         st.markdown('</div>', unsafe_allow_html=True)
 
     with col5:
         # Botón de eliminación
         st.markdown('<div class="col-button">', unsafe_allow_html=True)
-        if st.button("Eliminar selección", use_container_width=True):
+        if st.button("Eliminar selección", width="stretch"):
             if not selected_ids:
                 st.warning("Por favor, selecciona al menos un registro")
             else:
-                for record_id in selected_ids:
-                    try:
-                        delete_record(record_id)
-                    except Exception as e:
-                        st.error(f"Error al eliminar registro {record_id}: {str(e)}")
-                        break
+                try:
+                    deleted = delete_records(selected_ids)
+                except Exception as e:
+                    st.error(f"Error al eliminar registros: {str(e)}")
                 else:
-                    st.success(f"{len(selected_ids)} registro(s) eliminado(s) correctamente")
+                    clear_selection()
+                    if SOFT_DELETE:
+                        st.session_state.last_deleted_ids = selected_ids
+                    st.success(f"{deleted} registro(s) eliminado(s) correctamente")
                     # Actualizar el archivo Excel después de eliminar
                     export_to_excel()
                     st.rerun()
         st.markdown('</div>', unsafe_allow_html=True)
 
-# Manejar clic en botón Modificar
-if modify_clicked:
-    if len(selected_ids) == 0:
-        st.warning("Por favor, selecciona un registro para modificar")
-    elif len(selected_ids) > 1:
-        st.warning("Por favor, selecciona solo un registro para modificar")
-    else:
-        record_id = selected_ids[0]
-        st.session_state.record_to_edit = record_id
-        st.session_state.is_editing = True
-        st.success(f"Registro #{record_id} cargado para modificación")
+    # Deshacer la última eliminación lógica de esta sesión
+    if st.session_state.get("last_deleted_ids"):
+        last_deleted = st.session_state.last_deleted_ids
+        u1, u2 = st.columns([3, 1])
+        with u1:
+            st.caption(f"{len(last_deleted)} registro(s) eliminado(s).")
+        with u2:
+            if st.button("Deshacer", key="undo_delete_btn", width="stretch"):
+                restore_records(last_deleted)
+                clear_selection()
+                st.session_state.last_deleted_ids = None
+                export_to_excel()
+                st.rerun()
+
+    # Resultado de la última importación (sobrevive al st.rerun)
+    import_report = st.session_state.pop("import_report", None)
+    if import_report:
+        st.success(import_report["message"])
+        if import_report["rejected"]:
+            with st.expander(f"Filas rechazadas ({len(import_report['rejected'])})"):
+                st.dataframe(pd.DataFrame(import_report["rejected"]), hide_index=True)
+
+    # Altas sin N° Registro en el archivo porque la sincronización tuvo filas rechazadas
+    if st.session_state.get("sync_rewrite_pending"):
+        r1, r2 = st.columns([3, 1])
+        with r1:
+            st.warning(
+                f"{EXCEL_FILE} no se reescribió para no perder las filas rechazadas, así que las "
+                f"{st.session_state.sync_rewrite_pending} alta(s) no tienen N° Registro en el archivo y "
+                "una nueva sincronización las agregaría otra vez. Reescríbelo antes de volver a sincronizar."
+            )
+        with r2:
+            if st.button(f"Reescribir {EXCEL_FILE}", key="sync_rewrite_btn", width="stretch",
+                         help="Escribe los registros de la base en el archivo; las filas rechazadas se pierden"):
+                export_to_excel()
+                st.session_state.pop("sync_rewrite_pending", None)
+                st.rerun()
+
+    # Estado del respaldo en Excel, que se actualiza en segundo plano
+    mirror_status = get_excel_mirror(str(DB_PATH.resolve()), str(Path(EXCEL_FILE).resolve())).status()
+    if mirror_status["last_error"]:
+        st.caption(f"⚠️ No se pudo actualizar {EXCEL_FILE}: {mirror_status['last_error']}")
+    elif mirror_status["pending"]:
+        st.caption(f"Actualizando {EXCEL_FILE}…")
+    elif mirror_status["last_success"]:
+        st.caption(f"{EXCEL_FILE} actualizado a las {mirror_status['last_success']:%H:%M:%S}")
+
+    # Texto completo e historial del registro seleccionado; la grilla solo trae el inicio del Detalle
+    if len(selected_ids) == 1:
+        with st.expander(f"Detalle del registro #{selected_ids[0]}", expanded=True):
+            record = get_record(selected_ids[0])
+            if record is None:
+                st.caption("Registro archivado o eliminado: la grilla muestra el inicio del texto.")
+            else:
+                st.text(record["detalle"])
+        with st.expander(f"Historial del registro #{selected_ids[0]}"):
+            history = get_history(selected_ids[0])
+            if history.empty:
+                st.caption("Sin cambios registrados desde la última importación.")
+            else:
+                st.dataframe(history, hide_index=True, width="stretch")
+
+    # Edición concurrente detectada al guardar
+    if st.session_state.edit_conflict:
+        conflict_prompt()
+
+    # Manejar clic en botón Modificar
+    if modify_clicked:
+        if len(selected_ids) == 0:
+            st.warning("Por favor, selecciona un registro para modificar")
+        elif len(selected_ids) > 1:
+            st.warning("Por favor, selecciona solo un registro para modificar")
+        else:
+            record_id = selected_ids[0]
+            record = get_record(record_id)
+            if record is None:
+                st.warning(f"El registro #{record_id} ya no existe o pertenece a un año archivado (solo lectura)")
+            else:
+                start_editing(record)
+                st.success(f"Registro #{record_id} cargado para modificación")
+                st.rerun()
+
+    # Manejar envío del formulario (Registrar o Actualizar)
+    if submitted:
+        reg = form_to_record()
+        if not reg["detalle"]:
+            st.warning("Por favor, escribe las observaciones antes de registrar.")
+            return
+
+        if st.session_state.is_editing and st.session_state.record_to_edit:
+            # Modo edición: actualizar solo si nadie cambió el registro desde que se cargó
+            record_id = st.session_state.record_to_edit
+            try:
+                base = st.session_state.record_base or {}
+                update_record(record_id, reg, expected_version=base.get("row_version"))
+            except ConflictError as e:
+                st.session_state.edit_conflict = {"mine": reg, "current": e.current}
+                conflict_prompt()
+                return
+            except Exception as e:
+                st.error(f"Error al actualizar el registro: {str(e)}")
+                return
+            st.success(f"Registro #{record_id} actualizado correctamente.")
+            # Resetear estado de edición
+            stop_editing()
+        else:
+            # Modo nuevo: insertar registro
+            try:
+                new_id = insert_record(reg)
+            except Exception as e:
+                st.error(f"Error al guardar el registro: {str(e)}")
+                return
+            st.success(f"Registro #{new_id} guardado correctamente.")
+        
+        # Actualizar el archivo Excel después de insertar/actualizar
+        export_to_excel()
         st.rerun()
 
-# Manejar envío del formulario (Registrar o Actualizar)
-if submitted:
-    detalle_content = detalle
-    
-    if not detalle_content.strip():
-        st.warning("Por favor, escribe las observaciones antes de registrar.")
-        st.stop()
-
-    reg = {
-        "direccion_regional": direccion,
-        "item_monitoreo": item,
-        "detalle": detalle_content.strip(),
-        "estado": estado.strip(),
-        "plazo_dias": int(plazo) if plazo else 0,
-        "fecha_reunion": fecha.strftime("%Y-%m-%d"),
-    }
+@st.fragment
+@timed("fragmento.resumen")
+def resumen_panel():
+    summary = get_summary()
+    st.markdown('<div class="section-title">Resumen de registros</div>', unsafe_allow_html=True)
 
-    if st.session_state.is_editing and st.session_state.record_to_edit:
-        # Modo edición: actualizar registro existente
-        update_record(st.session_state.record_to_edit, reg)
-        st.success(f"Registro #{st.session_state.record_to_edit} actualizado correctamente.")
-        # Resetear estado de edición
-        st.session_state.editing_id = None
-        st.session_state.is_editing = False
-        st.session_state.record_to_edit = None
+    by_estado = summary["estado"]
+    estados = ESTADOS + [e for e in by_estado.index if e not in ESTADOS]  # p. ej. "Sin estado"
+    cards = st.columns(len(estados) + 1)
+    cards[0].metric("Total", int(by_estado.sum()))
+    for column, estado in zip(cards[1:], estados):
+        column.metric(estado, int(by_estado.get(estado, 0)))
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown('<div class="section-title">Por Dirección Regional</div>', unsafe_allow_html=True)
+        st.bar_chart(summary["direccion_regional"].reindex(REGIONES).dropna(), horizontal=True, color=PRIMARY)
+    with c2:
+        st.markdown('<div class="section-title">Por Ítem Monitoreo</div>', unsafe_allow_html=True)
+        st.bar_chart(summary["item_monitoreo"].reindex(ITEMS_MONITOREO).dropna(), horizontal=True, color=PRIMARY)
+
+    st.markdown('<div class="section-title">Reuniones por mes</div>', unsafe_allow_html=True)
+    st.line_chart(summary["mes"], color=PRIMARY)
+
+@st.fragment
+@timed("fragmento.vencimientos")
+def vencimientos_panel():
+    st.markdown('<div class="section-title">Vencidos / por vencer</div>', unsafe_allow_html=True)
+    v1, v2 = st.columns([2, 1])
+    with v1:
+        region = st.selectbox("Dirección Regional", ["Todas"] + REGIONES, key="v_region")
+    with v2:
+        days_ahead = st.number_input("Días por vencer", min_value=0, max_value=365, value=DUE_SOON_DAYS, step=1, key="v_dias")
+
+    counts = count_due_by_region(days_ahead)
+    if counts.empty:
+        st.info("No hay compromisos abiertos vencidos ni por vencer")
+        return
+    st.bar_chart(counts, horizontal=True, stack=True)
+
+    due = get_due_records(None if region == "Todas" else region, days_ahead)
+    st.dataframe(due, hide_index=True, width="stretch")
+    if len(due) == DUE_LIMIT:
+        st.caption(f"Se muestran los {DUE_LIMIT} compromisos más atrasados")
+
+# =========================
+# Rendimiento (solo administradores)
+# =========================
+ADMIN_EMAILS = {
+    e.strip() for e in os.environ.get("SEGUIMIENTO_ADMINS", "dcostar@isl.gob.cl").split(",") if e.strip()
+}
+SESSION_COUNTERS_KEY = "perf_counters"
+
+def is_admin():
+    return st.session_state.get("current_user") in ADMIN_EMAILS
+
+def _session_counters():
+    # Los hilos en segundo plano (espejo Excel) no tienen sesión
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.setdefault(SESSION_COUNTERS_KEY, {})
+
+if metrics.ENABLED:
+    metrics.REGISTRY.session_counters = _session_counters
+
+def _timings_frame(rows):
+    """rows: (operación, llamadas, segundos totales, segundos máx. o None)"""
+    df = pd.DataFrame(rows, columns=["Operación", "Llamadas", "Total ms", "Máx. ms"])
+    df["Total ms"] = (df["Total ms"] * 1000).round(1)
+    df["Máx. ms"] = (df["Máx. ms"] * 1000).round(1)
+    df.insert(3, "Media ms", (df["Total ms"] / df["Llamadas"]).round(2))
+    return df.sort_values("Total ms", ascending=False)
+
+@st.fragment
+def rendimiento_panel():
+    st.markdown('<div class="section-title">Rendimiento</div>', unsafe_allow_html=True)
+    if not metrics.ENABLED:
+        st.info("La instrumentación está desactivada; se activa iniciando la app con SEGUIMIENTO_METRICAS=1.")
+        return
+
+    registry = metrics.REGISTRY
+    st.caption(
+        f"Desde {registry.started:%d-%m-%Y %H:%M:%S} · umbral de operación lenta {registry.slow_ms:g} ms · "
+        f"archivo {metrics.METRICS_FILE}"
+    )
+    snapshot = registry.snapshot()
+    st.markdown("**Proceso**")
+    st.dataframe(_timings_frame([
+        (name, t["count"], t["total"], t["max"]) for name, t in snapshot.items()
+    ]), hide_index=True, width="stretch")
+
+    st.markdown("**Esta sesión**")
+    counters = st.session_state.get(SESSION_COUNTERS_KEY, {})
+    st.dataframe(_timings_frame([
+        (name, count, total, float("nan")) for name, (count, total) in counters.items()
+    ]).drop(columns="Máx. ms"), hide_index=True, width="stretch")
+
+    st.markdown(f"**Operaciones lentas** (últimas {metrics.SLOW_LOG_SIZE})")
+    slow = list(registry.slow_log)[::-1]
+    if slow:
+        st.dataframe(pd.DataFrame([
+            {"Momento": e["momento"], "Operación": e["operacion"], "ms": e["ms"], "SQL": "\n".join(e["sql"])}
+            for e in slow
+        ]), hide_index=True, width="stretch")
     else:
-        # Modo nuevo: insertar registro
-        new_id = insert_record(reg)
-        st.success(f"Registro #{new_id} guardado correctamente.")
-    
-    # Actualizar el archivo Excel después de insertar/actualizar
-    export_to_excel()
-    st.rerun()
+        st.caption("Sin operaciones sobre el umbral")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.download_button(
+            "Descargar métricas (Prometheus)", data=registry.prometheus_text,
+            file_name="metricas.prom", mime="text/plain", width="stretch"
+        )
+    with c2:
+        if st.button("Reiniciar métricas", key="reset_metrics_btn", width="stretch"):
+            registry.reset()
+            st.session_state.pop(SESSION_COUNTERS_KEY, None)
+            st.rerun(scope="fragment")
+
+def dump_metrics():
+    """Vuelca las métricas al archivo local (como mucho cada METRICS_FILE_INTERVAL_S)"""
+    try:
+        metrics.REGISTRY.dump()
+    except OSError:
+        pass  # Un disco lleno o sin permisos no debe romper la app
+
+# =========================
+# Layout principal
+# =========================
+@timed("rerun")
+def main():
+    st.set_page_config(page_title=PAGE_TITLE, layout="wide")
+
+    # Verificar autenticación
+    check_authentication()
+
+    st.markdown(page_styles(), unsafe_allow_html=True)
+    st.markdown(header_html(), unsafe_allow_html=True)
+    session_controls()
+
+    init_db_once(str(DB_PATH.resolve()))
+    _purge_deleted_daily(date.today())
+    ensure_excel_file(str(Path(EXCEL_FILE).resolve()))
+    init_session_state()
+
+    tab_names = ["Registros", "Resumen", "Vencimientos"] + (["Rendimiento"] if is_admin() else [])
+    tab_registros, tab_resumen, tab_vencimientos, *tab_admin = st.tabs(tab_names)
+    with tab_registros:
+        col_left, col_middle, col_right = st.columns([0.4, 0.6, 1.0], gap="large")
+        with col_left:
+            registro_panel()
+        with col_middle:
+            observaciones_panel()
+        with col_right:
+            registros_panel()
+    with tab_resumen:
+        resumen_panel()
+    with tab_vencimientos:
+        vencimientos_panel()
+    for tab in tab_admin:
+        with tab:
+            rendimiento_panel()
+
+    # Mostrar indicador de modo edición
+    if st.session_state.is_editing and st.session_state.record_to_edit:
+        st.info(f"Modo edición: Modificando registro #{st.session_state.record_to_edit}")
 
-# Mostrar indicador de modo edición
-if st.session_state.is_editing and st.session_state.record_to_edit:
-    st.info(f"Modo edición: Modificando registro #{st.session_state.record_to_edit}")
+    if metrics.ENABLED:
+        dump_metrics()
 
+if __name__ == "__main__":
+    main()
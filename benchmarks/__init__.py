@@ -0,0 +1 @@
+"""Benchmarks de rendimiento de la aplicación de seguimiento regional."""
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Utilidades compartidas por los benchmarks.
+
+Los benchmarks nunca tocan las bases de datos del repositorio: cada uno
+trabaja sobre una copia en un directorio temporal, que pasa a ser el
+directorio de trabajo mientras dura la medición.
+"""
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP_SCRIPT = REPO_ROOT / "app.py"
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))  # app, storage y excel_io
+
+DATA_FILES = (
+    "seguimiento_regional.db",
+    "usuarios.db",
+    "registros.xlsx",
+)
+
+def load_app():
+    """Importa app.py como módulo (main() solo corre bajo streamlit run)"""
+    import app
+
+    return app
+
+@contextmanager
+def workspace(copy_data=True):
+    """Directorio temporal con copia de los datos; se usa como cwd"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        if copy_data:
+            for name in DATA_FILES:
+                src = REPO_ROOT / name
+                if src.exists():
+                    shutil.copy2(src, tmp)
+        os.chdir(tmp)
+        try:
+            yield Path(tmp)
+        finally:
+            os.chdir(previous)
+
+def summarize(samples):
+    """Resumen en milisegundos de una lista de tiempos en segundos"""
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))]
+    return {
+        "n": len(ms),
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(p95, 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+def measure(fn, repeat=20, warmup=2):
+    """Ejecuta fn varias veces y devuelve el resumen de tiempos"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def app_test(script=APP_SCRIPT, timeout=60):
+    """AppTest con una sesión ya autenticada"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(Path(script).resolve()), default_timeout=timeout)
+    at.session_state["authenticated"] = True
+    at.session_state["current_user"] = "benchmark@isl.gob.cl"
+    return at
+
+def measure_reruns(script=APP_SCRIPT, repeat=20, warmup=2):
+    """Tiempo de ejecución completa del script por cada rerun"""
+    at = app_test(script)
+
+    def rerun():
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    return measure(rerun, repeat=repeat, warmup=warmup)
+
+def print_table(title, rows):
+    """Imprime una tabla simple nombre → resumen"""
+    print(f"\n{title}")
+    print(f"{'escenario':<32}{'mediana ms':>12}{'p95 ms':>10}{'min ms':>10}")
+    for name, stats in rows:
+        print(f"{name:<32}{stats['median_ms']:>12.3f}{stats['p95_ms']:>10.3f}{stats['min_ms']:>10.3f}")
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Ediciones concurrentes del mismo registro con y sin row_version.
+
+Uso:
+    python -m benchmarks.bench_concurrent_edits [--threads 16] [--edits 50]
+
+Cada hilo repite leer → sumar 1 a plazo_dias → guardar sobre un mismo
+registro. Sin comprobar la versión (update_record a ciegas) se pierden
+incrementos; con expected_version cada conflicto se reintenta releyendo,
+así que el plazo final debe ser exactamente hilos × ediciones. Aquí solo
+se reportan tiempos y ediciones perdidas; la garantía la comprueba
+tests/test_concurrent_edits.py.
+"""
+import argparse
+import threading
+import time
+
+from benchmarks._common import workspace
+from benchmarks.generate import synthetic_frame, write_app_database
+import storage
+
+def hammer(record_id, threads, edits, checked):
+    """Lanza los hilos; devuelve (segundos, conflictos reintentados)"""
+    conflicts = [0] * threads
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        barrier.wait()
+        for _ in range(edits):
+            while True:
+                record = storage.get_record(record_id)
+                changes = {field: record[field] for field in storage.BATCH_UPDATE_COLUMNS}
+                changes["plazo_dias"] += 1
+                try:
+                    storage.update_record(record_id, changes, record["row_version"] if checked else None)
+                    break
+                except storage.ConflictError:
+                    conflicts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - start, sum(conflicts)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--edits", type=int, default=50, help="ediciones confirmadas por hilo")
+    args = parser.parse_args()
+    expected = args.threads * args.edits
+
+    with workspace(copy_data=False) as tmp:
+        write_app_database(tmp / "seguimiento_regional.db", synthetic_frame(100))
+        storage.configure(db_path=tmp / "seguimiento_regional.db")
+        for checked in (False, True):
+            record_id = 2 if checked else 1
+            base = storage.get_record(record_id)
+            storage.update_record(record_id, {**base, "plazo_dias": 0})
+            elapsed, conflicts = hammer(record_id, args.threads, args.edits, checked)
+            final = storage.get_record(record_id)
+            lost = expected - final["plazo_dias"]
+            label = "con row_version" if checked else "a ciegas"
+            print(
+                f"{label:<16} {expected} ediciones en {elapsed:.2f} s "
+                f"({expected / elapsed:.0f}/s), {conflicts} conflicto(s) reintentado(s), {lost} perdida(s)"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Conexión nueva por consulta vs. pool compartido en modo WAL.
+
+Uso:
+    python -m benchmarks.bench_connections [--script RUTA] [--repeat N]
+
+Mide dos cosas:
+  * la secuencia de consultas que hace un rerun (conteo, listado y lectura
+    de un registro) abriendo una conexión por consulta, como hacía app.py,
+    frente a la misma secuencia sobre conexiones WAL reutilizadas;
+  * el tiempo de un rerun completo del script con AppTest. Para comparar
+    antes/después basta con pasar --script apuntando a otra versión de app.py.
+"""
+import argparse
+import sqlite3
+
+import pandas as pd
+
+from benchmarks._common import APP_SCRIPT, measure, measure_reruns, print_table, workspace
+
+DB_PATH = "seguimiento_regional.db"
+USER_DB_PATH = "usuarios.db"
+
+def _rerun_queries(connect_db, connect_users):
+    with connect_users() as con:
+        con.execute("SELECT * FROM usuarios WHERE email = ?", ("dcostar@isl.gob.cl",)).fetchone()
+    with connect_db() as con:
+        con.execute("SELECT COUNT(*) FROM registros").fetchone()
+    with connect_db() as con:
+        pd.read_sql_query("SELECT * FROM registros ORDER BY id ASC", con)
+    with connect_db() as con:
+        con.execute("SELECT * FROM registros WHERE id = ?", (1,)).fetchone()
+
+def bench_queries(repeat):
+    def fresh():
+        _rerun_queries(lambda: sqlite3.connect(DB_PATH), lambda: sqlite3.connect(USER_DB_PATH))
+
+    pooled_db = sqlite3.connect(DB_PATH, isolation_level=None)
+    pooled_users = sqlite3.connect(USER_DB_PATH, isolation_level=None)
+    for con in (pooled_db, pooled_users):
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute("PRAGMA cache_size=-16000")
+        con.execute("PRAGMA mmap_size=67108864")
+
+    def pooled():
+        _rerun_queries(lambda: pooled_db, lambda: pooled_users)
+
+    try:
+        return [
+            ("consultas, conexión nueva", measure(fresh, repeat=repeat)),
+            ("consultas, pool WAL", measure(pooled, repeat=repeat)),
+        ]
+    finally:
+        pooled_db.close()
+        pooled_users.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default=str(APP_SCRIPT), help="app.py a medir")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with workspace():
+        print_table("Consultas de un rerun", bench_queries(args.repeat * 10))
+    with workspace():
+        print_table("Rerun completo (AppTest)", [(args.script, measure_reruns(args.script, repeat=args.repeat))])
+
+if __name__ == "__main__":
+    main()
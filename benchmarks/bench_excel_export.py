@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Costo de generar el xlsx de "Exportar Excel".
+
+Uso:
+    python -m benchmarks.bench_excel_export [--sizes 1000 10000 100000]
+
+Antes, cada rerun serializaba la tabla completa con openpyxl para llenar
+st.download_button ("xlsx por rerun"). Ahora el archivo se genera solo al
+hacer clic y se memoiza por versión de la tabla, así que un rerun sin clic
+no paga nada y una segunda descarga sin cambios solo consulta la caché.
+"""
+import argparse
+import io
+import time
+
+import pandas as pd
+
+from benchmarks._common import print_table, summarize
+from benchmarks.generate import display_frame, synthetic_frame
+
+def build_xlsx(df):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False)
+    return buffer.getvalue()
+
+def bench_size(rows, repeat):
+    df = display_frame(synthetic_frame(rows))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build_xlsx(df)
+        samples.append(time.perf_counter() - start)
+
+    cache = {}
+    version = 1
+
+    def cached_download():
+        if version not in cache:
+            cache[version] = build_xlsx(df)
+        return cache[version]
+
+    cached_download()
+    hits = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cached_download()
+        hits.append(time.perf_counter() - start)
+    return [
+        (f"{rows:>7} filas, xlsx por rerun", summarize(samples)),
+        (f"{rows:>7} filas, descarga en caché", summarize(hits)),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        rows.extend(bench_size(size, args.repeat))
+    print_table("Exportación xlsx", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Exportación e importación en xlsx, CSV, Parquet y Arrow IPC.
+
+Uso:
+    python -m benchmarks.bench_export_formats [--sizes 100000] [--repeat 3] [--no-import]
+
+Sobre una base sintética mide, por formato, storage.write_records hacia un
+archivo (tiempo, tamaño y pico de memoria de Python con tracemalloc) y
+storage.import_from_excel del archivo recién escrito. El xlsx arma un
+DataFrame completo y pasa por openpyxl; los demás formatos se escriben por
+bloques desde el cursor, así que su pico de memoria no depende del total.
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from benchmarks._common import measure, print_table, summarize, workspace
+from benchmarks.generate import synthetic_frame, write_app_database
+import storage
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+def bench_size(rows, repeat, run_import):
+    results = []
+    with workspace(copy_data=False) as tmp:
+        db_path = tmp / "seguimiento_regional.db"
+        write_app_database(db_path, synthetic_frame(rows))
+        storage.configure(db_path=db_path)
+        pool = storage.get_pool(db_path)
+        for fmt in storage.available_export_formats():
+            path = tmp / f"registros.{fmt}"
+
+            def export():
+                with open(path, "wb") as f:
+                    storage.write_records(pool, f, fmt)
+
+            summary = measure(export, repeat=repeat, warmup=1)
+            summary["mb"] = round(os.path.getsize(path) / 1e6, 2)
+            summary["pico_mb"] = round(_peak_mb(export), 1)
+            results.append((f"{rows:>7} filas, exportar {fmt}", summary))
+
+        if run_import:
+            for fmt in storage.available_export_formats():
+                start = time.perf_counter()
+                success, message, _ = storage.import_from_excel(str(tmp / f"registros.{fmt}"))
+                elapsed = time.perf_counter() - start
+                if not success:
+                    raise RuntimeError(message)
+                results.append((f"{rows:>7} filas, importar {fmt}", summarize([elapsed])))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-import", action="store_true", help="medir solo la exportación")
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        rows.extend(bench_size(size, args.repeat, run_import=not args.no_import))
+    print_table("Formatos de exportación", rows)
+    for name, summary in rows:
+        if "mb" in summary:
+            print(f"{name}: {summary['mb']} MB en disco, pico {summary['pico_mb']} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Tiempo de "Importar Excel" de punta a punta.
+
+Uso:
+    python -m benchmarks.bench_import [--sizes 10000 100000] [--script RUTA]
+
+Genera un registros.xlsx sintético, abre la app con AppTest y mide el
+rerun del clic en "Importar Excel" (lectura, normalización, carga y el
+rerun posterior). También mide pd.read_excel por separado, que es un costo
+fijo de ambas versiones, para aislar el trabajo propio de la importación.
+"""
+import argparse
+import sqlite3
+import time
+
+import pandas as pd
+
+from benchmarks._common import APP_SCRIPT, app_test, print_table, summarize, workspace
+from benchmarks.generate import display_frame, synthetic_frame
+
+def bench_size(script, rows):
+    with workspace():
+        display_frame(synthetic_frame(rows)).to_excel("registros.xlsx", index=False)
+
+        start = time.perf_counter()
+        pd.read_excel("registros.xlsx")
+        read_time = time.perf_counter() - start
+
+        at = app_test(script, timeout=600)
+        at.run()
+        button = next(b for b in at.button if b.label == "Importar Excel")
+        start = time.perf_counter()
+        button.click().run()
+        import_time = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+        with sqlite3.connect("seguimiento_regional.db") as con:
+            loaded = con.execute("SELECT COUNT(*) FROM registros").fetchone()[0]
+        if loaded != rows:
+            raise RuntimeError(f"se esperaban {rows} filas y se cargaron {loaded}")
+    return [
+        (f"{rows:>7} filas, pd.read_excel", summarize([read_time])),
+        (f"{rows:>7} filas, importar", summarize([import_time])),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default=str(APP_SCRIPT), help="app.py a medir")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        rows.extend(bench_size(args.script, size))
+    print_table(f"Importación ({args.script})", rows)
+
+if __name__ == "__main__":
+    main()
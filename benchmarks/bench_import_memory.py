@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Memoria máxima al leer y normalizar registros.xlsx.
+
+Uso:
+    python -m benchmarks.bench_import_memory [--sizes 10000 50000 100000]
+
+Compara pd.read_excel sobre el archivo completo con la lectura por bloques
+de excel_io.iter_excel_chunks. Cada medición corre en un proceso nuevo y
+reporta el pico de memoria residente (ru_maxrss) y el pico de memoria
+Python según tracemalloc, descontando lo que ocupa el proceso ya iniciado.
+"""
+import argparse
+import multiprocessing
+import resource
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks._common import workspace
+from benchmarks.generate import display_frame, synthetic_frame
+
+def _read_full(path):
+    from excel_io import normalize_import_frame
+
+    df = pd.read_excel(path)
+    df.index = df.index + 2
+    return len(normalize_import_frame(df)[0])
+
+def _read_chunks(path):
+    from excel_io import iter_excel_chunks, normalize_import_frame
+
+    return sum(len(normalize_import_frame(chunk)[0]) for chunk in iter_excel_chunks(path))
+
+MODES = {"pd.read_excel": _read_full, "por bloques": _read_chunks}
+
+def _peak_rss_kib():
+    # ru_maxrss se hereda del padre a través de exec; VmHWM no
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _child(mode, path, out):
+    import excel_io  # noqa: F401 - cargar dependencias antes de medir la base
+
+    baseline = _peak_rss_kib()
+    tracemalloc.start()
+    rows = MODES[mode](path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss = _peak_rss_kib()
+    out.put((rows, (rss - baseline) / 1024, peak / 2**20))
+
+def measure(mode, path):
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(mode, path, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'filas':>8}  {'modo':<16}{'Δ RSS MiB':>12}{'pico Python MiB':>18}")
+    for size in args.sizes:
+        with workspace(copy_data=False) as tmp:
+            path = str(tmp / "registros.xlsx")
+            display_frame(synthetic_frame(size)).to_excel(path, index=False)
+            for mode in MODES:
+                rows, rss_mib, py_mib = measure(mode, path)
+                print(f"{rows:>8}  {mode:<16}{rss_mib:>12.1f}{py_mib:>18.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Tabla activa frente a años archivados en bases de solo lectura.
+
+Uso:
+    python -m benchmarks.bench_partitions [--rows-per-year 50000] [--years 2022 2023 2024 2025 2026] [--repeat 10]
+
+Genera una base con --rows-per-year registros por año y mide, antes y
+después de storage.archive_year para cada año terminado: la carga completa
+de la tabla (load_all_records), el conteo y una página sin filtro de
+fechas, y la misma página con un rango que cruza años archivados (que
+adjunta sus bases). Falla con AssertionError si el rango de fechas no
+devuelve los mismos registros antes y después de archivar.
+"""
+import argparse
+import time
+from datetime import date
+
+import pandas as pd
+
+from benchmarks._common import measure, print_table, summarize, workspace
+from benchmarks.generate import synthetic_frame, write_app_database
+import storage
+
+def scenarios(db_path, first, last, repeat):
+    rows = {}
+    span = {"fecha_desde": date(first, 1, 1), "fecha_hasta": date(last, 12, 31)}
+    rows["load_all_records"] = measure(lambda: storage.load_all_records(db_path), repeat=max(3, repeat // 3), warmup=1)
+    rows["load_filtered_count sin fechas"] = measure(lambda: storage.load_filtered_count(db_path, {}), repeat=repeat)
+    rows["página sin fechas"] = measure(lambda: storage.fetch_records_page(db_path, {}), repeat=repeat)
+    rows[f"página {first}-{last}"] = measure(
+        lambda: storage.fetch_records_page(db_path, span, "fecha_reunion", True), repeat=repeat
+    )
+    rows[f"conteo {first}-{last}"] = measure(lambda: storage.load_filtered_count(db_path, span), repeat=repeat)
+    return rows, storage.load_filtered_count(db_path, span), storage.fetch_records_page(db_path, span, "fecha_reunion", True)[1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows-per-year", type=int, default=50_000)
+    parser.add_argument("--years", type=int, nargs="+", default=[2022, 2023, 2024, 2025, 2026])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    current = date.today().year
+
+    with workspace(copy_data=False) as tmp:
+        db_path = tmp / "seguimiento_regional.db"
+        frame = pd.concat(
+            [synthetic_frame(args.rows_per_year, seed=year, start=date(year, 1, 6)) for year in args.years],
+            ignore_index=True
+        )
+        write_app_database(db_path, frame)
+        storage.configure(db_path=db_path)
+        storage.init_db()
+
+        first, last = min(args.years), max(args.years)
+        before, count_before, page_before = scenarios(db_path, first, last, args.repeat)
+
+        archived = []
+        for year in args.years:
+            if year >= current:
+                continue
+            start = time.perf_counter()
+            moved = storage.archive_year(year)
+            archived.append((f"archive_year({year}): {moved} filas", summarize([time.perf_counter() - start])))
+
+        after, count_after, page_after = scenarios(db_path, first, last, args.repeat)
+        assert count_after == count_before, f"el rango cuenta {count_after} registros, antes {count_before}"
+        assert page_after == page_before, "la página del rango cambió al archivar"
+
+        print(f"Tabla activa: {storage.load_count(db_path)} de {len(frame)} registros")
+        print_table("Archivado", archived)
+        print_table("Antes de archivar", list(before.items()))
+        print_table("Después de archivar", list(after.items()))
+
+if __name__ == "__main__":
+    main()
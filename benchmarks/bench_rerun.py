@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Tiempo de ejecución del script por rerun y tamaño del HTML enviado.
+
+Uso:
+    python -m benchmarks.bench_rerun [--script RUTA] [--repeat N]
+
+Mide el primer run de una sesión y los reruns siguientes con AppTest, y
+suma los bytes de los elementos markdown del árbol (estilos, encabezado y
+formularios), que es lo que viaja al navegador en cada rerun. Para comparar
+con una versión anterior de app.py basta con pasar --script.
+"""
+import argparse
+import shutil
+import time
+
+from benchmarks._common import APP_SCRIPT, REPO_ROOT, app_test, print_table, summarize, workspace
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default=str(APP_SCRIPT), help="app.py a medir")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with workspace() as tmp:
+        # Versiones anteriores de app.py leían el logo desde el directorio de trabajo
+        shutil.copy2(REPO_ROOT / "static" / "LOGO-PROPIO-ISL-2023-CMYK-01.png", tmp)
+        at = app_test(args.script)
+        start = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - start
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            at.run()
+            samples.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        payload = sum(len(m.value.encode()) for m in at.markdown)
+
+    print_table(f"Reruns ({args.script})", [("primer run", summarize([first])), ("rerun", summarize(samples))])
+    print(f"HTML markdown por rerun: {payload / 1024:.1f} KiB")
+
+if __name__ == "__main__":
+    main()
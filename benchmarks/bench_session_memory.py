@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Memoria de los frames de registros y de cada sesión de la app.
+
+Uso:
+    python -m benchmarks.bench_session_memory [--rows 100000] [--sessions 5] [--page-size 200] [--short]
+
+Sobre una base sintética con actas largas (benchmarks.generate.LONG_DETALLE_LINES)
+mide el tamaño en memoria (memory_usage(deep=True)) de la página de la
+grilla (storage.load_records_page) y de la tabla completa
+(storage.load_all_records). Después abre --sessions sesiones de AppTest
+con la página más grande y reporta los bytes Arrow que la grilla envía al
+navegador y, con tracemalloc, cuánta memoria queda retenida por sesión y
+el pico de su primer rerun. Una sesión previa, fuera
+de la medición, carga los módulos y llena las cachés compartidas. Para
+comparar versiones se corre el mismo benchmark en cada commit.
+"""
+import argparse
+import gc
+import statistics
+import tracemalloc
+
+from benchmarks._common import app_test, workspace
+from benchmarks.generate import LONG_DETALLE_LINES, synthetic_frame, write_app_database
+import storage
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+def traced_mb():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=storage.PAGE_SIZES[-1], choices=storage.PAGE_SIZES)
+    parser.add_argument("--short", action="store_true", help="actas de 1 a 6 líneas en vez de largas")
+    args = parser.parse_args()
+
+    with workspace(copy_data=False) as tmp:
+        detalle_lines = (1, 6) if args.short else LONG_DETALLE_LINES
+        write_app_database(tmp / "seguimiento_regional.db", synthetic_frame(args.rows, detalle_lines=detalle_lines))
+        storage.configure(db_path=tmp / "seguimiento_regional.db")
+        storage.init_db()
+
+        page = storage.load_records_page(storage.DB_PATH, {}, "id", False, 1, args.page_size)
+        everything = storage.load_all_records(storage.DB_PATH)
+        print(f"Página de {len(page)} filas:     {frame_mb(page):8.2f} MB")
+        print(f"Tabla de {len(everything)} filas: {frame_mb(everything):8.2f} MB")
+        print("Tipos:", ", ".join(f"{column}={dtype}" for column, dtype in page.dtypes.items()))
+        del page, everything
+
+        def open_session():
+            at = app_test()
+            at.session_state["page_size"] = args.page_size
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+            return at
+
+        sessions = [open_session()]  # Las sesiones siguen vivas, como usuarios conectados
+        tracemalloc.start()
+        try:
+            retained, peaks, grid = [], [], []
+            for _ in range(args.sessions):
+                before = traced_mb()
+                tracemalloc.reset_peak()
+                sessions.append(open_session())
+                peaks.append(tracemalloc.get_traced_memory()[1] / 1e6 - before)
+                retained.append(traced_mb() - before)
+                grid.append(len(sessions[-1].dataframe[0].proto.arrow_data.data) / 1e6)
+        finally:
+            tracemalloc.stop()
+
+        print(f"\n{args.sessions} sesión(es), página de {args.page_size} filas")
+        print(f"{'sesión':<10}{'retenido MB':>14}{'pico MB':>12}{'grilla MB':>12}")
+        for i, (kept, peak, sent) in enumerate(zip(retained, peaks, grid), 1):
+            print(f"{i:<10}{kept:>14.2f}{peak:>12.2f}{sent:>12.3f}")
+        print(f"Mediana por sesión: {statistics.median(retained):.2f} MB retenidos, {statistics.median(peaks):.2f} MB de pico")
+
+if __name__ == "__main__":
+    main()
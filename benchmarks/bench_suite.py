@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Escenarios de la capa de datos y reruns de la app por tamaño de base.
+
+Uso:
+    python -m benchmarks.bench_suite [--sizes 10000 100000] [--data DIR]
+                                     [--repeat N] [--output RUTA.json] [--no-import]
+
+Por cada tamaño usa (o genera con benchmarks.generate) DIR/<filas>/ y, sobre
+una copia en un directorio temporal, mide las funciones de app.py: conteo,
+listado con y sin caché, alta, modificación, eliminación por lotes,
+exportación e importación del Excel fijo, más el rerun completo del script
+con AppTest. El resultado se guarda en JSON; para detectar regresiones se
+comparan dos archivos con benchmarks.compare.
+"""
+import argparse
+import itertools
+import json
+import platform
+import shutil
+import sqlite3
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from benchmarks._common import APP_SCRIPT, REPO_ROOT, load_app, measure, measure_reruns, print_table, summarize, workspace
+from benchmarks.generate import DATASET_SIZES, generate_dataset
+import storage
+
+DELETE_BATCH = 100
+SAMPLE_RECORD = {
+    "direccion_regional": "Magallanes",
+    "item_monitoreo": "Otros",
+    "detalle": "-Registro creado por el benchmark.",
+    "estado": "Pendiente",
+    "plazo_dias": 15,
+    "fecha_reunion": "2025-06-02",
+}
+
+def _uncached(fn):
+    """fn tras vaciar st.cache_data, como el primer rerun después de un cambio"""
+    def run():
+        st.cache_data.clear()
+        return fn()
+    return run
+
+def _once(fn):
+    start = time.perf_counter()
+    fn()
+    return summarize([time.perf_counter() - start])
+
+def bench_size(app, dataset, repeat, run_import):
+    """Escenarios sobre una copia del conjunto de datos; devuelve {escenario: resumen}"""
+    heavy = max(3, repeat // 4)
+    results = {}
+    with workspace(copy_data=False) as tmp:
+        for name in ("seguimiento_regional.db", "usuarios.db", "registros.xlsx"):
+            if (dataset / name).exists():
+                shutil.copy2(dataset / name, tmp)
+        app.init_db_once(str(app.DB_PATH.resolve()))
+        with sqlite3.connect(app.DB_PATH) as con:
+            ids = [row[0] for row in con.execute(f"SELECT id FROM {storage.TABLE} ORDER BY id")]
+        con.close()
+
+        results["get_count"] = measure(_uncached(app.get_count), repeat=repeat)
+        results["get_all_records (sin caché)"] = measure(_uncached(app.get_all_records), repeat=heavy, warmup=1)
+        results["get_all_records (con caché)"] = measure(app.get_all_records, repeat=repeat)
+        results["insert_record"] = measure(lambda: app.insert_record(SAMPLE_RECORD), repeat=repeat)
+
+        to_update = itertools.cycle(ids)
+        results["update_record"] = measure(lambda: app.update_record(next(to_update), SAMPLE_RECORD), repeat=repeat)
+
+        # Lotes disjuntos desde el final para no repetir ids ya eliminados
+        batches = (ids[-(i + 1) * DELETE_BATCH:len(ids) - i * DELETE_BATCH] for i in itertools.count())
+        results[f"delete_records ({DELETE_BATCH} ids)"] = measure(lambda: app.delete_records(next(batches)), repeat=repeat)
+
+        results["export_to_excel (encolar)"] = measure(app.export_to_excel, repeat=repeat)
+        mirror = app.get_excel_mirror(str(app.DB_PATH.resolve()), str(Path(app.EXCEL_FILE).resolve()))
+        mirror.flush()
+        results["write_excel_file"] = _once(lambda: storage.write_excel_file(storage.get_pool(app.DB_PATH), app.EXCEL_FILE))
+
+        if run_import and (dataset / "registros.xlsx").exists():
+            # La planilla original, no la recién exportada con las filas modificadas
+            shutil.copy2(dataset / "registros.xlsx", tmp)
+
+            def do_import():
+                success, message, _ = app.import_from_fixed_excel()
+                if not success:
+                    raise RuntimeError(message)
+
+            results["import_from_fixed_excel"] = _once(do_import)
+
+        results["rerun AppTest"] = measure_reruns(APP_SCRIPT, repeat=heavy, warmup=1)
+        mirror.flush()
+    return results
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "pandas": pd.__version__,
+        "streamlit": st.__version__,
+        "plataforma": platform.platform(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DATASET_SIZES[:2])
+    parser.add_argument("--data", default=str(REPO_ROOT / "benchmarks" / "data"), help="directorio de benchmarks.generate")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="archivo JSON (por defecto benchmarks/results/<fecha>.json)")
+    parser.add_argument("--no-import", action="store_true", help="omitir import_from_fixed_excel")
+    args = parser.parse_args()
+
+    app = load_app()
+    report = {"entorno": environment(), "repeat": args.repeat, "resultados": {}}
+    for rows in args.sizes:
+        dataset = Path(args.data) / str(rows)
+        if not (dataset / "seguimiento_regional.db").exists():
+            print(f"Generando {rows} filas en {dataset}…")
+            generate_dataset(args.data, rows, excel=not args.no_import)
+        results = bench_size(app, dataset, args.repeat, run_import=not args.no_import)
+        report["resultados"][str(rows)] = results
+        print_table(f"{rows} filas", list(results.items()))
+
+    output = Path(args.output or REPO_ROOT / "benchmarks" / "results" / f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nResultados en {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Sincronización incremental frente a importación completa.
+
+Uso:
+    python -m benchmarks.bench_sync [--rows 100000] [--changes 100] [--formato xlsx|csv|parquet|arrow]
+
+Exporta una base sintética al formato elegido, cambia --changes filas del
+archivo (una modificación, una eliminación y una alta por cada tres) y mide
+storage.sync_from_file contra storage.import_from_excel sobre el mismo
+archivo. También mide la sincronización de un archivo sin cambios, que
+solo compara fecha de modificación y tamaño.
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks._common import print_table, summarize, workspace
+from benchmarks.generate import synthetic_frame, write_app_database
+import storage
+
+def edit_file(path, changes):
+    """Modifica, elimina y agrega filas en el archivo exportado"""
+    readers = {"xlsx": pd.read_excel, "csv": pd.read_csv, "parquet": pd.read_parquet, "arrow": pd.read_feather}
+    fmt = storage.export_format(path)
+    df = readers[fmt](path)
+    step = max(1, len(df) // max(1, changes))
+    targets = df.index[::step][:changes]
+    modified, removed, added = targets[0::3], targets[1::3], targets[2::3]
+    df["Detalle"] = df["Detalle"].astype(object)
+    df.loc[modified, "Detalle"] = df.loc[modified, "Detalle"] + " (editado)"
+    new_rows = df.loc[added].assign(id=pd.NA)
+    df = pd.concat([df.drop(index=removed), new_rows], ignore_index=True)
+    df["id"] = df["id"].astype("Int64")
+    if fmt == "xlsx":
+        df.to_excel(path, index=False)
+    elif fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path)
+
+def timed_call(fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    if not result[0]:
+        raise RuntimeError(result[1])
+    return elapsed, result[1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=100)
+    parser.add_argument("--formato", default="xlsx", choices=list(storage.EXPORT_FORMATS))
+    args = parser.parse_args()
+
+    with workspace(copy_data=False) as tmp:
+        db_path = tmp / "seguimiento_regional.db"
+        write_app_database(db_path, synthetic_frame(args.rows))
+        storage.configure(db_path=db_path)
+        storage.init_db()
+        pool = storage.get_pool(db_path)
+        path = tmp / f"registros.{args.formato}"
+        storage.remember_file(pool, path, storage.write_export_file(pool, path))
+
+        rows = []
+        elapsed, _ = timed_call(lambda: storage.sync_from_file(path))
+        rows.append(("sync sin cambios", summarize([elapsed])))
+
+        edit_file(path, args.changes)
+        elapsed, message = timed_call(lambda: storage.sync_from_file(path))
+        rows.append((f"sync {args.changes} cambios", summarize([elapsed])))
+        print(message)
+
+        elapsed, message = timed_call(lambda: storage.import_from_excel(str(path)))
+        rows.append(("importación completa", summarize([elapsed])))
+        print(message)
+        print_table(f"{args.rows} filas, {args.formato}", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Escrituras concurrentes: transacción por operación frente a la cola de escritura.
+
+Uso:
+    python -m benchmarks.bench_write_queue [--writers 50] [--ops 40] [--rows 10000]
+
+Simula --writers sesiones que, a la vez, alternan altas y modificaciones.
+En modo "directo" cada operación abre su propia transacción BEGIN IMMEDIATE
+en el pool compartido, como antes de la cola; en modo "cola" pasan por
+storage.insert_record y storage.update_record, que las entregan al hilo
+escritor y esperan su COMMIT. Reporta rendimiento, latencias p50/p99 y
+operaciones fallidas (bloqueo de la base o pool agotado).
+"""
+import argparse
+import queue
+import random
+import sqlite3
+import threading
+import time
+
+from benchmarks._common import print_table, summarize, workspace
+from benchmarks.generate import synthetic_frame, write_app_database
+import storage
+
+SAMPLE_RECORD = {
+    "direccion_regional": "Magallanes",
+    "item_monitoreo": "Otros",
+    "detalle": "-Registro creado por el benchmark.",
+    "estado": "Pendiente",
+    "plazo_dias": 15,
+    "fecha_reunion": "2025-06-02",
+}
+
+def direct(fn, *args):
+    """Una transacción por operación, compitiendo por el bloqueo de escritura"""
+    with storage.get_pool(storage.DB_PATH).connection(write=True) as con:
+        return fn(con, *args)
+
+def run(writers, ops, rows, queued):
+    """Lanza los escritores; devuelve (segundos, latencias, errores)"""
+    latencies = [[] for _ in range(writers)]
+    errors = [0] * writers
+    barrier = threading.Barrier(writers)
+
+    def worker(index):
+        rng = random.Random(index)
+        barrier.wait()
+        for i in range(ops):
+            start = time.perf_counter()
+            try:
+                if i % 2 == 0:
+                    if queued:
+                        storage.insert_record(SAMPLE_RECORD)
+                    else:
+                        direct(storage._insert_record, SAMPLE_RECORD)
+                else:
+                    record_id = rng.randint(1, rows)
+                    if queued:
+                        storage.update_record(record_id, SAMPLE_RECORD)
+                    else:
+                        direct(storage._update_record, record_id, SAMPLE_RECORD, None)
+            except (sqlite3.OperationalError, queue.Empty):
+                errors[index] += 1
+                continue
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, [s for per_writer in latencies for s in per_writer], sum(errors)
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000 if ordered else float("nan")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=40, help="operaciones por escritor")
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with workspace(copy_data=False) as tmp:
+        db_path = tmp / "seguimiento_regional.db"
+        write_app_database(db_path, synthetic_frame(args.rows))
+        storage.configure(db_path=db_path)
+        storage.init_db()
+
+        rows = []
+        for queued in (False, True):
+            label = "cola" if queued else "directo"
+            elapsed, latencies, errors = run(args.writers, args.ops, args.rows, queued)
+            rows.append((label, summarize(latencies)))
+            print(
+                f"{label:<8} {len(latencies)} escrituras en {elapsed:.2f} s ({len(latencies) / elapsed:.0f}/s), "
+                f"p50 {percentile(latencies, 0.50):.1f} ms, p99 {percentile(latencies, 0.99):.1f} ms, "
+                f"{errors} fallida(s)"
+            )
+        writer = storage.get_writer(db_path)
+        print(f"cola: {writer.writes} escrituras en {writer.batches} transacciones")
+        print_table(f"{args.writers} escritores × {args.ops} operaciones", rows)
+
+if __name__ == "__main__":
+    main()
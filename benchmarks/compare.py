@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Compara dos resultados JSON de benchmarks.bench_suite.
+
+Uso:
+    python -m benchmarks.compare BASE.json NUEVO.json [--threshold 1.2]
+
+Muestra la mediana de cada escenario en ambos archivos y la razón
+nuevo/base; marca como regresión lo que supere --threshold. Sale con
+código 1 si hubo alguna regresión, para poder usarlo en scripts.
+"""
+import argparse
+import json
+import sys
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["resultados"]
+
+def compare(base, new, threshold):
+    """Filas (tamaño, escenario, base_ms, nuevo_ms, razón, regresión)"""
+    rows = []
+    for size, scenarios in new.items():
+        for name, stats in scenarios.items():
+            before = base.get(size, {}).get(name)
+            if before is None:
+                continue
+            ratio = stats["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+            rows.append((size, name, before["median_ms"], stats["median_ms"], ratio, ratio > threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.2, help="razón nuevo/base considerada regresión")
+    args = parser.parse_args()
+
+    rows = compare(load(args.base), load(args.new), args.threshold)
+    print(f"{'filas':>9}  {'escenario':<32}{'base ms':>12}{'nuevo ms':>12}{'razón':>8}")
+    for size, name, before, after, ratio, regression in rows:
+        flag = "  ← regresión" if regression else ""
+        print(f"{size:>9}  {name:<32}{before:>12.3f}{after:>12.3f}{ratio:>8.2f}{flag}")
+    sys.exit(1 if any(row[-1] for row in rows) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Generador de datos sintéticos para los benchmarks.
+
+Uso:
+    python -m benchmarks.generate [--sizes 10000 100000 1000000] [--out DIR] [--no-excel]
+
+Crea, por cada tamaño, DIR/<filas>/ con seguimiento_regional.db en el
+esquema vigente de storage.py, el registros.xlsx equivalente y una copia de
+usuarios.db. Con la misma semilla los datos son siempre los mismos.
+"""
+import argparse
+import random
+import shutil
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks._common import REPO_ROOT
+import storage
+from storage import ESTADOS, ITEMS_MONITOREO, REGIONES
+
+FRASES = [
+    "Se revisa avance del compromiso con la Dirección Regional.",
+    "DR informa que se realizaron las conversaciones correspondientes.",
+    "Pendiente respuesta desde nivel central sobre el concurso.",
+    "Se acuerda enviar informe de ejecución presupuestaria.",
+    "Revisar licencias médicas prolongadas y reemplazos.",
+    "Coordinar visita a terreno para evaluar infraestructura.",
+    "Se solicita actualizar indicadores de desempeño del trimestre.",
+    "Seguimiento a plan de trabajo de clima laboral.",
+]
+
+DATASET_SIZES = [10_000, 100_000, 1_000_000]
+LONG_DETALLE_LINES = (4, 20)  # Actas reales: varios párrafos por reunión
+
+def synthetic_frame(rows, seed=2025, start=date(2025, 1, 6), detalle_lines=(1, 6)):
+    """DataFrame con columnas internas de la tabla registros (sin id)"""
+    rng = random.Random(seed)
+    fechas = [start + timedelta(days=7 * i) for i in range(52)]
+    return pd.DataFrame({
+        "direccion_regional": [rng.choice(REGIONES) for _ in range(rows)],
+        "item_monitoreo": [rng.choice(ITEMS_MONITOREO) for _ in range(rows)],
+        "detalle": [
+            "\n".join("-" + rng.choice(FRASES) for _ in range(rng.randint(*detalle_lines)))
+            for _ in range(rows)
+        ],
+        "estado": [rng.choice(ESTADOS) for _ in range(rows)],
+        "plazo_dias": [rng.choice((0, 7, 15, 30, 60, 90)) for _ in range(rows)],
+        "fecha_reunion": [rng.choice(fechas).isoformat() for _ in range(rows)],
+    })
+
+def display_frame(frame):
+    """Convierte el frame interno al formato de columnas que exporta la app"""
+    out = frame.rename(columns={
+        "direccion_regional": "Dirección Regional",
+        "item_monitoreo": "Ítem Monitoreo",
+        "detalle": "Detalle",
+        "estado": "Estado",
+        "plazo_dias": "Plazo (días)",
+    })
+    out["Fecha Reunión"] = pd.to_datetime(out.pop("fecha_reunion")).dt.strftime("%d-%m-%Y")
+    out.insert(0, "id", range(1, len(out) + 1))
+    return out
+
+def write_database(path, frame):
+    """Crea una base seguimiento_regional.db con el frame indicado"""
+    import sqlite3
+
+    with sqlite3.connect(path) as con:
+        con.execute("DROP TABLE IF EXISTS registros")
+        con.execute("""
+            CREATE TABLE registros(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                direccion_regional TEXT NOT NULL,
+                item_monitoreo TEXT NOT NULL,
+                detalle TEXT NOT NULL,
+                estado TEXT,
+                plazo_dias INTEGER,
+                fecha_reunion TEXT
+            );
+        """)
+        con.executemany(
+            """INSERT INTO registros
+               (direccion_regional, item_monitoreo, detalle, estado, plazo_dias, fecha_reunion)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            frame.itertuples(index=False, name=None),
+        )
+    con.close()
+
+def write_app_database(path, frame):
+    """Crea una base con el esquema vigente de storage.py y el frame indicado.
+
+    Las filas se insertan antes de crear índices, búsqueda y resumen, que
+    así se llenan en bloque en lugar de fila a fila por los triggers.
+    """
+    from excel_io import IMPORT_COLUMNS
+
+    con = sqlite3.connect(path, isolation_level=None)
+    try:
+        con.execute("BEGIN")
+        storage.create_records_table(con)
+        con.executemany(
+            f"INSERT INTO {storage.TABLE} ({', '.join(IMPORT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            frame[IMPORT_COLUMNS].itertuples(index=False, name=None),
+        )
+        storage.create_records_schema(con)
+        con.execute(f"PRAGMA user_version = {storage.SCHEMA_VERSION}")
+        con.execute("COMMIT")
+    finally:
+        con.close()
+
+def generate_dataset(directory, rows, excel=True, seed=2025):
+    """Genera DIR/<filas>/ con base, planilla y usuarios; devuelve la ruta"""
+    target = Path(directory) / str(rows)
+    target.mkdir(parents=True, exist_ok=True)
+    frame = synthetic_frame(rows, seed=seed, detalle_lines=LONG_DETALLE_LINES)
+    db_path = target / "seguimiento_regional.db"
+    if db_path.exists():
+        db_path.unlink()
+    write_app_database(db_path, frame)
+    if excel:
+        display_frame(frame).to_excel(target / "registros.xlsx", index=False)
+    users = REPO_ROOT / "usuarios.db"
+    if users.exists():
+        shutil.copy2(users, target)
+    return target
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DATASET_SIZES)
+    parser.add_argument("--out", default=str(REPO_ROOT / "benchmarks" / "data"))
+    parser.add_argument("--no-excel", action="store_true", help="no generar registros.xlsx")
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+
+    for rows in args.sizes:
+        target = generate_dataset(args.out, rows, excel=not args.no_excel, seed=args.seed)
+        print(f"{rows:>9} filas → {target}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""Operaciones masivas sobre la base de registros sin levantar Streamlit.
+
+Uso:
+    python cli.py [--db RUTA] import [ARCHIVO] [--rechazos RECHAZOS.csv]
+    python cli.py [--db RUTA] sync [ARCHIVO] [--rechazos RECHAZOS.csv] [--forzar] [--reescribir]
+    python cli.py [--db RUTA] export [ARCHIVO] [--formato xlsx|csv|parquet|arrow]
+    python cli.py [--db RUTA] query [--region R ...] [--item I ...] [--estado E ...]
+                                    [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD] [--buscar TEXTO]
+                                    [--orden COLUMNA] [--desc] [--pagina N] [--tamano N] [--json]
+    python cli.py [--db RUTA] stats [--json]
+    python cli.py [--db RUTA] vacuum [--dias N]
+    python cli.py [--db RUTA] archive AÑO
+
+Pensado para tareas nocturnas y cargas por script: solo importa pandas y
+openpyxl en los comandos que leen o escriben planillas. import y export
+aceptan xlsx, CSV, Parquet y Arrow IPC según la extensión del archivo.
+archive mueve los registros cerrados de un año terminado a una base de
+solo lectura; query los incluye cuando --desde/--hasta alcanzan ese año.
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import date
+
+import storage
+
+def _progress(done, total):
+    print(f"\r{done}/{total or '?'} fila(s) leída(s)", end="", file=sys.stderr, flush=True)
+
+def _write_rejected(path, rejected):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["fila", "motivo"])
+        writer.writeheader()
+        writer.writerows(rejected)
+
+def cmd_import(args):
+    path = args.archivo or storage.EXCEL_FILE
+    success, message, rejected = storage.import_from_excel(path, progress=_progress)
+    print(file=sys.stderr)
+    if rejected and args.rechazos:
+        _write_rejected(args.rechazos, rejected)
+    print(message)
+    return 0 if success else 1
+
+def cmd_sync(args):
+    path = args.archivo or storage.EXCEL_FILE
+    success, message, rejected, changes = storage.sync_from_file(path, progress=_progress, force=args.forzar)
+    print(file=sys.stderr)
+    if rejected and args.rechazos:
+        _write_rejected(args.rechazos, rejected)
+    if success and changes["altas"] and rejected and not args.reescribir:
+        # Reescribir perdería las filas rechazadas; sin el id, la próxima sincronización repetiría las altas
+        print(f"{path} no se reescribió porque tiene filas rechazadas; las {changes['altas']} alta(s) "
+              "no tienen N° Registro en el archivo. Use --reescribir para escribirlo de todos modos",
+              file=sys.stderr)
+    elif success and changes["altas"]:
+        # Sin el id asignado, la próxima sincronización volvería a dar de alta las mismas filas
+        pool = storage.get_pool(storage.DB_PATH)
+        storage.remember_file(pool, path, storage.write_export_file(pool, path))
+        print(f"{path} reescrito con el N° Registro de las altas", file=sys.stderr)
+    print(message)
+    return 0 if success else 1
+
+def cmd_export(args):
+    path = args.archivo or storage.EXCEL_FILE
+    storage.write_export_file(storage.get_pool(storage.DB_PATH), path, args.formato)
+    print(f"{storage.load_count(storage.DB_PATH)} registro(s) exportado(s) a {path}")
+    return 0
+
+def cmd_query(args):
+    if args.buscar:
+        query = storage.fts_query(args.buscar)
+        df = storage.load_search(storage.DB_PATH, query, args.tamano) if query else None
+        columns = storage.SEARCH_COLUMNS
+        if df is not None:
+            df["snippet"] = df["snippet"].map(storage.mark_snippet)
+        rows = [] if df is None else list(df.itertuples(index=False, name=None))
+    else:
+        filters = {
+            "direccion_regional": args.region,
+            "item_monitoreo": args.item,
+            "estado": args.estado,
+            "fecha_desde": args.desde,
+            "fecha_hasta": args.hasta,
+        }
+        columns, rows = storage.fetch_records_page(
+            storage.DB_PATH, filters, args.orden, args.desc, args.pagina, args.tamano
+        )
+    if args.json:
+        json.dump([dict(zip(columns, row)) for row in rows], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    return 0
+
+def cmd_stats(args):
+    stats = storage.database_stats()
+    if args.json:
+        json.dump(stats, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    print(f"Base:               {stats['base']} ({stats['bytes'] / 1e6:.1f} MB, esquema v{stats['version_esquema']})")
+    print(f"Registros vigentes: {stats['vigentes']}")
+    print(f"Eliminados:         {stats['eliminados']} (se purgan a los {storage.SOFT_DELETE_RETENTION_DAYS} días)")
+    print(f"Vencidos abiertos:  {stats['vencidos']}")
+    for year, rows in stats["archivados"].items():
+        print(f"Archivados {year}:    {rows} ({storage.archive_path(storage.DB_PATH, year).name})")
+    for dimension, values in stats["resumen"].items():
+        print(f"\n{dimension}")
+        for valor, total in sorted(values.items(), key=lambda item: -item[1]):
+            print(f"  {valor:<32}{total:>9}")
+    return 0
+
+def cmd_vacuum(args):
+    purged, before, after = storage.compact_database(args.dias)
+    print(f"{purged} registro(s) purgado(s); {before / 1e6:.1f} MB → {after / 1e6:.1f} MB")
+    return 0
+
+def cmd_archive(args):
+    moved = storage.archive_year(args.anio)
+    print(f"{moved} registro(s) de {args.anio} movido(s) a {storage.archive_path(storage.DB_PATH, args.anio)}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help=f"base de datos (por defecto {storage.DB_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("import", help="reemplaza los registros con los de una planilla")
+    p.add_argument("archivo", nargs="?", help=f"xlsx, csv, parquet o arrow (por defecto {storage.EXCEL_FILE})")
+    p.add_argument("--rechazos", help="CSV donde guardar las filas rechazadas")
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser("sync", help="aplica solo las diferencias de una planilla, emparejando por N° Registro")
+    p.add_argument("archivo", nargs="?", help=f"xlsx, csv, parquet o arrow (por defecto {storage.EXCEL_FILE})")
+    p.add_argument("--rechazos", help="CSV donde guardar las filas rechazadas")
+    p.add_argument("--forzar", action="store_true", help="comparar aunque el archivo no haya cambiado")
+    p.add_argument("--reescribir", action="store_true",
+                   help="escribir el N° Registro de las altas aunque haya filas rechazadas, que se pierden del archivo")
+    p.set_defaults(func=cmd_sync)
+
+    p = commands.add_parser("export", help="escribe todos los registros vigentes en una planilla")
+    p.add_argument("archivo", nargs="?", help=f"planilla (por defecto {storage.EXCEL_FILE})")
+    p.add_argument("--formato", choices=list(storage.EXPORT_FORMATS), help="por defecto, según la extensión del archivo")
+    p.set_defaults(func=cmd_export)
+
+    p = commands.add_parser("query", help="lista registros filtrados como CSV o JSON")
+    p.add_argument("--region", action="append", choices=storage.REGIONES, metavar="REGION")
+    p.add_argument("--item", action="append", choices=storage.ITEMS_MONITOREO, metavar="ITEM")
+    p.add_argument("--estado", action="append", choices=storage.ESTADOS)
+    p.add_argument("--desde", type=date.fromisoformat, help="fecha de reunión mínima (AAAA-MM-DD)")
+    p.add_argument("--hasta", type=date.fromisoformat, help="fecha de reunión máxima (AAAA-MM-DD)")
+    p.add_argument("--buscar", help="texto a buscar en las observaciones (ignora los filtros)")
+    p.add_argument("--orden", default="id", choices=sorted(storage.SORT_COLUMNS.values()))
+    p.add_argument("--desc", action="store_true")
+    p.add_argument("--pagina", type=int, default=1)
+    p.add_argument("--tamano", type=int, default=100, help="filas por página")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_query)
+
+    p = commands.add_parser("stats", help="conteos por región, ítem, estado y mes")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_stats)
+
+    p = commands.add_parser("vacuum", help="purga eliminados e historial antiguos y compacta la base")
+    p.add_argument("--dias", type=int, default=storage.SOFT_DELETE_RETENTION_DAYS, help="antigüedad mínima de las marcas a purgar")
+    p.set_defaults(func=cmd_vacuum)
+
+    p = commands.add_parser("archive", help="mueve los registros cerrados de un año terminado a su propia base")
+    p.add_argument("anio", type=int, metavar="AÑO")
+    p.set_defaults(func=cmd_archive)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    storage.configure(db_path=args.db)
+    try:
+        storage.init_db()
+        return args.func(args)
+    except (storage.MigrationError, storage.ArchiveError, OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""Lectura y normalización de planillas de registros, sin depender de Streamlit.
+
+Además del xlsx se aceptan CSV, Parquet y Arrow IPC; los dos últimos
+requieren pyarrow, que se importa solo al leerlos.
+"""
+import re
+import unicodedata
+from datetime import date
+from importlib.util import find_spec
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+IMPORT_CHUNK_ROWS = 5000
+
+IMPORT_RENAME_MAP = {
+    "N° Registro": "id",
+    "Dirección Regional": "direccion_regional",
+    "Ítem Monitoreo": "item_monitoreo",
+    "Detalle": "detalle",
+    "Estado": "estado",
+    "Plazo (días)": "plazo_dias",
+    "Fecha Reunión": "fecha_reunion"
+}
+IMPORT_COLUMNS = ["direccion_regional", "item_monitoreo", "detalle", "estado", "plazo_dias", "fecha_reunion"]
+
+def _choice_key(value):
+    text = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode().lower()
+    text = re.sub(r"^\s*tema\s*:", "", text)
+    return re.sub(r"[^a-z0-9]", "", text)
+
+def canonical_choice(value, choices):
+    """Valor de choices equivalente a value, o None si no hay uno único.
+
+    Ignora mayúsculas, tildes, puntuación y el prefijo "Tema:"; acepta
+    también abreviaturas que sean el inicio o el final de una sola opción
+    ("Arica" → "Arica y Parinacota", "Araucanía" → "La Araucanía").
+    """
+    key = _choice_key(value)
+    if not key:
+        return None
+    keys = {_choice_key(choice): choice for choice in choices}
+    if key in keys:
+        return keys[key]
+    if len(key) >= 4:
+        matches = [choice for k, choice in keys.items() if k.startswith(key) or k.endswith(key)]
+        if len(matches) == 1:
+            return matches[0]
+    return None
+
+def canonicalize(series, choices):
+    """Aplica canonical_choice una vez por valor distinto; NaN si no se resuelve"""
+    mapping = {value: canonical_choice(value, choices) for value in series.dropna().unique()}
+    return series.map(mapping).astype(object).where(lambda s: s.notna(), None)
+
+def count_excel_rows(path):
+    """Filas de datos según las dimensiones de la hoja, o None si no se conocen"""
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        max_row = wb.worksheets[0].max_row
+        return max_row - 1 if max_row else None
+    finally:
+        wb.close()
+
+def iter_excel_chunks(path, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Recorre la primera hoja en bloques de chunk_rows filas.
+
+    Usa el modo read-only de openpyxl, por lo que nunca hay más de un bloque
+    en memoria. El índice de cada DataFrame es el número de fila en la
+    planilla, para poder informar rechazos. Las filas vacías se omiten.
+    """
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"columna_{i}" for i, c in enumerate(header, 1)]
+        width = len(columns)
+        values, index = [], []
+        for row_number, row in enumerate(rows, start=2):
+            if all(v is None for v in row):
+                continue
+            values.append(row[:width] + (None,) * (width - len(row)))
+            index.append(row_number)
+            if len(values) >= chunk_rows:
+                yield pd.DataFrame(values, columns=columns, index=index)
+                values, index = [], []
+        if values:
+            yield pd.DataFrame(values, columns=columns, index=index)
+    finally:
+        wb.close()
+
+def iter_csv_chunks(path, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Recorre un CSV en bloques; el índice es la fila contando el encabezado"""
+    reader = pd.read_csv(path, chunksize=chunk_rows, dtype=str, keep_default_na=False, na_values=[""])
+    with reader:
+        for chunk in reader:
+            chunk.index = chunk.index + 2
+            yield chunk
+
+def _arrow_batches(path, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if Path(path).suffix.lower() == ".parquet":
+        yield from pq.ParquetFile(path).iter_batches(batch_size=chunk_rows)
+        return
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for offset in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(offset, chunk_rows)
+
+def iter_columnar_chunks(path, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Recorre un Parquet o Arrow IPC por lotes, sin cargar el archivo entero"""
+    start = 2
+    for batch in _arrow_batches(path, chunk_rows):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+def count_columnar_rows(path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if Path(path).suffix.lower() == ".parquet":
+        return pq.ParquetFile(path).metadata.num_rows
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+IMPORT_READERS = {
+    ".xlsx": (iter_excel_chunks, count_excel_rows),
+    ".csv": (iter_csv_chunks, lambda path: None),  # Los saltos de línea en Detalle impiden contar barato
+    ".parquet": (iter_columnar_chunks, count_columnar_rows),
+    ".arrow": (iter_columnar_chunks, count_columnar_rows),
+    ".feather": (iter_columnar_chunks, count_columnar_rows),
+}
+
+def import_reader(path):
+    """(iterador de bloques, contador de filas) según la extensión de path"""
+    suffix = Path(path).suffix.lower()
+    if suffix not in IMPORT_READERS:
+        raise ValueError(f"Formato no soportado: {suffix or path} (use {', '.join(IMPORT_READERS)})")
+    if IMPORT_READERS[suffix][0] is iter_columnar_chunks and find_spec("pyarrow") is None:
+        raise ValueError("Parquet y Arrow requieren pyarrow (pip install pyarrow)")
+    return IMPORT_READERS[suffix]
+
+def normalize_import_frame(df, catalogs=None, fallbacks=None, keep_id=False):
+    """Normaliza columnas y fechas en una sola pasada vectorizada.
+
+    catalogs asocia columnas con sus valores permitidos; cada valor se lleva
+    a su forma canónica y, si no se reconoce, se usa fallbacks[columna] o se
+    rechaza la fila. Devuelve el frame listo para insertar y la lista de
+    filas rechazadas; el número de fila informado es el índice de df. Con
+    keep_id se conserva además la columna id ("N° Registro"), vacía (NA)
+    en las filas nuevas.
+    """
+    df = df.rename(columns=IMPORT_RENAME_MAP)
+    for column in IMPORT_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    motivos = pd.Series("", index=df.index)
+
+    def reject(mask, motivo):
+        motivos[mask & (motivos == "")] = motivo
+
+    if keep_id:
+        id_raw = df["id"] if "id" in df.columns else pd.Series(None, index=df.index, dtype=object)
+        ids = pd.to_numeric(id_raw, errors="coerce")
+        reject(id_raw.notna() & ids.isna(), "N° Registro no es numérico")
+        df["id"] = ids.round().astype("Int64")
+
+    for column, label in (("direccion_regional", "Dirección Regional"), ("item_monitoreo", "Ítem Monitoreo")):
+        text = df[column].astype("string").str.strip()
+        reject(text.isna() | (text == ""), f"Falta {label}")
+        df[column] = text
+
+    labels = {"direccion_regional": "Dirección Regional", "item_monitoreo": "Ítem Monitoreo", "estado": "Estado"}
+    for column, choices in (catalogs or {}).items():
+        raw = df[column].astype("string").str.strip().replace("", pd.NA)
+        canonical = canonicalize(raw, choices)
+        fallback = (fallbacks or {}).get(column)
+        if fallback is not None:
+            canonical = canonical.where(canonical.notna() | raw.isna(), fallback)
+        reject(raw.notna() & canonical.isna(), f"{labels.get(column, column)} fuera de catálogo")
+        df[column] = canonical
+
+    plazo_raw = df["plazo_dias"]
+    plazo = pd.to_numeric(plazo_raw, errors="coerce")
+    reject(plazo_raw.notna() & plazo.isna(), "Plazo (días) no es numérico")
+    reject(plazo < 0, "Plazo (días) negativo")
+    df["plazo_dias"] = plazo.fillna(0).astype("int64")
+
+    fecha_raw = df["fecha_reunion"]
+    # Especificar explícitamente el formato de fecha día-mes-año
+    fecha = pd.to_datetime(fecha_raw, format="%d-%m-%Y", errors="coerce")
+    reject(fecha_raw.notna() & fecha.isna(), "Fecha Reunión inválida (se espera DD-MM-AAAA)")
+    df["fecha_reunion"] = fecha.dt.strftime("%Y-%m-%d").fillna(date.today().strftime("%Y-%m-%d"))
+
+    df["detalle"] = df["detalle"].fillna("").astype(str)
+    df["estado"] = df["estado"].astype(object).where(df["estado"].notna(), None)
+
+    bad = motivos != ""
+    rejected = [
+        {"fila": int(fila), "motivo": motivo}
+        for fila, motivo in zip(df.index[bad], motivos[bad])
+    ]
+    return df.loc[~bad, (["id"] if keep_id else []) + IMPORT_COLUMNS], rejected
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""Instrumentación de tiempos de la app, sin depender de Streamlit.
+
+Se activa con SEGUIMIENTO_METRICAS=1. Desactivada, timed() devuelve la
+función original sin envoltorio, así que el costo es nulo.
+"""
+import functools
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+ENABLED = os.environ.get("SEGUIMIENTO_METRICAS", "0") == "1"
+SLOW_MS = float(os.environ.get("SEGUIMIENTO_LENTO_MS", "200"))  # Umbral del registro de consultas lentas
+SLOW_LOG_SIZE = 200
+SQL_TEXT_LIMIT = 500
+METRICS_FILE = os.environ.get("SEGUIMIENTO_METRICAS_ARCHIVO", "metricas.prom")
+METRICS_FILE_INTERVAL_S = 15.0
+BUCKETS_S = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROM_PREFIX = "seguimiento"
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+def redact_sql(sql):
+    """SQL sin valores literales (contraseñas, correos, textos) y acotado"""
+    text = " ".join(_LITERAL.sub("?", sql).split())
+    return text if len(text) <= SQL_TEXT_LIMIT else text[:SQL_TEXT_LIMIT] + "…"
+
+class _Timer:
+    __slots__ = ("count", "total", "max", "errors", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.buckets = [0] * len(BUCKETS_S)
+
+class Registry:
+    """Tiempos acumulados por operación y registro de operaciones lentas"""
+
+    def __init__(self, slow_ms=SLOW_MS):
+        self.slow_ms = slow_ms
+        self.started = datetime.now()
+        self.slow_log = deque(maxlen=SLOW_LOG_SIZE)
+        self.session_counters = None  # Callable que devuelve el dict de la sesión actual
+        self._timers = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_dump = 0.0
+
+    def trace_sql(self, statement):
+        """Callback de set_trace_callback: guarda el SQL de la operación en curso"""
+        statements = getattr(self._local, "statements", None)
+        if statements is not None:
+            statements.append(statement)
+
+    @contextmanager
+    def capture_sql(self):
+        """Junta en una lista aparte el SQL que este hilo ejecuta dentro del bloque"""
+        outer = getattr(self._local, "statements", None)
+        self._local.statements = statements = []
+        try:
+            yield statements
+        finally:
+            self._local.statements = outer
+
+    def add_sql(self, statements):
+        """Suma a la operación en curso SQL que se ejecutó por ella en otro hilo"""
+        current = getattr(self._local, "statements", None)
+        if current is not None:
+            current.extend(statements)
+
+    def observe(self, name, seconds, error=False, statements=()):
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = _Timer()
+            timer.count += 1
+            timer.total += seconds
+            timer.max = max(timer.max, seconds)
+            timer.errors += error
+            for i, bound in enumerate(BUCKETS_S):
+                if seconds <= bound:
+                    timer.buckets[i] += 1
+                    break
+            ms = seconds * 1000
+            if ms >= self.slow_ms:
+                self.slow_log.append({
+                    "momento": datetime.now(),
+                    "operacion": name,
+                    "ms": round(ms, 1),
+                    "sql": [redact_sql(s) for s in statements if not s.startswith(("PRAGMA", "BEGIN", "COMMIT"))],
+                })
+        counters = self.session_counters() if self.session_counters else None
+        if counters is not None:
+            entry = counters.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def timed(self, name):
+        """Decorador que mide fn; las llamadas anidadas se miden por separado"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                outer = getattr(self._local, "statements", None)
+                self._local.statements = statements = []
+                start = time.perf_counter()
+                error = False
+                try:
+                    return fn(*args, **kwargs)
+                except Exception:
+                    # Solo errores: st.stop y st.rerun derivan de BaseException
+                    error = True
+                    raise
+                finally:
+                    self._local.statements = outer
+                    if outer is not None:
+                        outer.extend(statements)
+                    self.observe(name, time.perf_counter() - start, error, statements)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Copia de los tiempos: {operación: dict con conteo, total, máximo, errores, buckets}"""
+        with self._lock:
+            return {
+                name: {"count": t.count, "total": t.total, "max": t.max, "errors": t.errors, "buckets": list(t.buckets)}
+                for name, t in self._timers.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self.slow_log.clear()
+
+    def prometheus_text(self):
+        """Métricas en formato de texto de Prometheus"""
+        lines = [
+            f"# HELP {PROM_PREFIX}_duracion_segundos Duración de las operaciones instrumentadas",
+            f"# TYPE {PROM_PREFIX}_duracion_segundos histogram",
+        ]
+        snapshot = self.snapshot()
+        for name, t in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS_S, t["buckets"]):
+                cumulative += count
+                lines.append(f'{PROM_PREFIX}_duracion_segundos_bucket{{operacion="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PROM_PREFIX}_duracion_segundos_bucket{{operacion="{name}",le="+Inf"}} {t["count"]}')
+            lines.append(f'{PROM_PREFIX}_duracion_segundos_sum{{operacion="{name}"}} {t["total"]:.6f}')
+            lines.append(f'{PROM_PREFIX}_duracion_segundos_count{{operacion="{name}"}} {t["count"]}')
+        lines += [
+            f"# HELP {PROM_PREFIX}_errores_total Operaciones instrumentadas que terminaron con excepción",
+            f"# TYPE {PROM_PREFIX}_errores_total counter",
+        ]
+        lines += [f'{PROM_PREFIX}_errores_total{{operacion="{name}"}} {t["errors"]}' for name, t in sorted(snapshot.items())]
+        lines += [
+            f"# HELP {PROM_PREFIX}_operaciones_lentas Operaciones sobre {self.slow_ms:g} ms en el registro",
+            f"# TYPE {PROM_PREFIX}_operaciones_lentas gauge",
+            f"{PROM_PREFIX}_operaciones_lentas {len(self.slow_log)}",
+            f"# HELP {PROM_PREFIX}_inicio_segundos Inicio del proceso (epoch)",
+            f"# TYPE {PROM_PREFIX}_inicio_segundos gauge",
+            f"{PROM_PREFIX}_inicio_segundos {self.started.timestamp():.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path=METRICS_FILE, min_interval=METRICS_FILE_INTERVAL_S):
+        """Escribe el archivo de métricas de forma atómica, como mucho cada min_interval segundos"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_dump < min_interval:
+                return False
+            self._last_dump = now
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".metricas-", suffix=".prom", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return True
+
+REGISTRY = Registry()
+
+def timed(name=None):
+    """Mide la función si la instrumentación está activa; si no, la devuelve tal cual"""
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+        return REGISTRY.timed(name or fn.__name__)(fn)
+    return decorator
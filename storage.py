@@ -0,0 +1,1875 @@
+# -*- coding: utf-8 -*-
+"""Acceso a la base de registros e importación/exportación, sin depender de Streamlit.
+
+Lo usan la app (que agrega la caché por versión de la tabla) y el CLI. pandas
+y openpyxl se importan dentro de las funciones que los necesitan, así los
+comandos que solo hablan con SQLite arrancan en milisegundos.
+"""
+import hashlib
+import html
+import io
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+import metrics
+from metrics import timed
+
+# =========================
+# Conexiones SQLite compartidas
+# =========================
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_POOL_SIZE = 8
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=67108864",
+    "PRAGMA foreign_keys=ON",
+)
+
+class ConnectionPool:
+    """Pool de conexiones SQLite reutilizables entre los hilos de Streamlit.
+
+    Cada conexión se abre una sola vez en modo WAL y se presta a un único
+    hilo a la vez; al devolverla se confirma o revierte la transacción.
+    """
+
+    def __init__(self, path, size=SQLITE_POOL_SIZE):
+        self.path = Path(path)
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        con = sqlite3.connect(
+            self.path,
+            timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        for pragma in SQLITE_PRAGMAS:
+            con.execute(pragma)
+        if metrics.ENABLED:
+            con.set_trace_callback(metrics.REGISTRY.trace_sql)
+        return con
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get(timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+
+    @contextmanager
+    def connection(self, write=False):
+        """Presta una conexión; con write=True abre una transacción BEGIN IMMEDIATE"""
+        con = self._acquire()
+        try:
+            if write:
+                con.execute("BEGIN IMMEDIATE")
+            with con:
+                yield con
+        finally:
+            if con.in_transaction:
+                con.rollback()
+            self._idle.put(con)
+
+    def close(self):
+        """Cierra las conexiones ociosas del pool"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(path):
+    """Pool de conexiones por archivo de base de datos, compartido por el proceso"""
+    key = str(Path(path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key)
+        return pool
+
+WRITE_BATCH_MAX = 64  # Escrituras que comparten una transacción (group commit)
+
+class WriteQueue:
+    """Hilo único que aplica las escrituras de todas las sesiones.
+
+    submit(fn, *args) encola fn(con, *args) y devuelve un Future. El hilo
+    toma todo lo pendiente (hasta batch_max) y lo aplica en una sola
+    transacción, cada escritura dentro de su SAVEPOINT: si una falla solo
+    ella se revierte y su Future recibe la excepción. Los Future se
+    resuelven después del COMMIT, así que un resultado implica datos
+    confirmados. Las sesiones ya no compiten por el bloqueo de escritura.
+    Con métricas activas, future.statements recibe el SQL que ejecutó fn,
+    para que write() lo cuente en la operación de quien la pidió.
+    """
+
+    def __init__(self, path, batch_max=WRITE_BATCH_MAX):
+        self.batch_max = batch_max
+        self.batches = 0
+        self.writes = 0
+        self._pool = ConnectionPool(path, size=1)
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.statements = []
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_max:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply([job for job in batch if job[0].set_running_or_notify_cancel()])
+
+    def _apply(self, batch):
+        outcomes = []
+        try:
+            with self._pool.connection(write=True) as con:
+                for future, fn, args, kwargs in batch:
+                    con.execute("SAVEPOINT escritura")
+                    with metrics.REGISTRY.capture_sql() as statements:
+                        try:
+                            outcomes.append((True, fn(con, *args, **kwargs)))
+                        except Exception as e:
+                            con.execute("ROLLBACK TO escritura")
+                            outcomes.append((False, e))
+                    future.statements = statements
+                    con.execute("RELEASE escritura")
+        except Exception as e:
+            # BEGIN o COMMIT fallaron: ninguna escritura del lote quedó confirmada
+            for future, *_ in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.writes += len(batch)
+        for (future, *_), (ok, value) in zip(batch, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+_writers = {}
+
+def get_writer(path):
+    """Cola de escritura por archivo de base de datos, una por proceso"""
+    key = str(Path(path).resolve())
+    with _pools_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = WriteQueue(key)
+        return writer
+
+def write(fn, *args, **kwargs):
+    """Aplica fn(con, *args) en el hilo escritor de DB_PATH y devuelve su resultado"""
+    future = get_writer(DB_PATH).submit(fn, *args, **kwargs)
+    try:
+        return future.result()
+    finally:
+        metrics.REGISTRY.add_sql(future.statements)
+
+# =========================
+# Datos
+# =========================
+DB_PATH = Path("seguimiento_regional.db")
+TABLE = "registros"
+EXCEL_FILE = "registros.xlsx"  # Archivo fijo para importación
+VERSIONS_TABLE = "versiones_tabla"
+FTS_TABLE = f"{TABLE}_fts"
+ACTIVE_VIEW = f"{TABLE}_vigentes"  # Registros sin marca de eliminación
+SUMMARY_TABLE = f"{TABLE}_resumen"  # Conteos por dimensión mantenidos por triggers
+DUE_VIEW = f"{TABLE}_vencimientos"  # Compromisos abiertos con su fecha de vencimiento
+HISTORY_TABLE = f"{TABLE}_historial"  # Cambios por registro, solo se agregan filas
+SYNC_TABLE = "sincronizacion_archivos"  # Huella del último archivo sincronizado o exportado
+ID_GENERATION = f"{TABLE}_generacion"  # Fila de versiones_tabla que cambia cuando una importación reinicia los ids
+PARTITIONS_TABLE = f"{TABLE}_particiones"  # Años archivados en bases de solo lectura
+ARCHIVING = f"{TABLE}_archivando"  # Fila de versiones_tabla que existe solo dentro de la transacción de archive_year
+CLOSED_STATES = ("Completado", "Cancelado")  # Estados que ya no vencen
+DUE_SOON_DAYS = 7  # Ventana de "por vencer"
+SOFT_DELETE = True  # Eliminar marca deleted_at y permite deshacer
+SOFT_DELETE_RETENTION_DAYS = 30  # Antigüedad a partir de la cual se purgan las marcas
+HISTORY_RETENTION_DAYS = 730  # Antigüedad a partir de la cual se purga el historial
+
+REGIONES = [
+    "Arica y Parinacota", "Tarapacá", "Antofagasta", "Atacama", "Coquimbo",
+    "Valparaíso", "Metropolitana", "O'Higgins", "Maule", "Ñuble",
+    "Biobío", "La Araucanía", "Los Ríos", "Los Lagos", "Aysén", "Magallanes"
+]
+
+ITEMS_MONITOREO = [
+    "Indicadores de desempeño","Ejecución Presupuestaria","Clima Laboral", "Infraestructura",
+    "Plan de SSPP", "Político Institucional",
+    "Temas Dpto. Personas", "Informática", "Otros"
+]
+
+ESTADOS = ["Pendiente", "En progreso", "Completado", "Cancelado"]
+
+def configure(db_path=None, excel_file=None):
+    """Cambia la base de datos y el Excel fijo que usan las funciones del módulo"""
+    global DB_PATH, EXCEL_FILE
+    if db_path is not None:
+        DB_PATH = Path(db_path)
+    if excel_file is not None:
+        EXCEL_FILE = str(excel_file)
+
+# =========================
+# Esquema
+# =========================
+def create_records_indexes(con):
+    """Índices que respaldan los filtros y el orden de la tabla paginada"""
+    con.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_region_fecha ON {TABLE}(direccion_regional, fecha_reunion)")
+    con.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_item ON {TABLE}(item_monitoreo)")
+    con.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_estado ON {TABLE}(estado)")
+    con.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_fecha ON {TABLE}(fecha_reunion)")
+    con.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_deleted ON {TABLE}(deleted_at) WHERE deleted_at IS NOT NULL")
+    # Solo compromisos abiertos: el índice no crece con los cerrados ni los eliminados
+    con.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_vencimiento ON {TABLE}(fecha_vencimiento) WHERE {OPEN_CONDITION}")
+    con.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_region_vencimiento "
+        f"ON {TABLE}(direccion_regional, fecha_vencimiento) WHERE {OPEN_CONDITION}"
+    )
+
+def create_search_index(con, rebuild=False):
+    """Índice FTS5 sobre detalle, sincronizado con triggers.
+
+    Es una tabla de contenido externo: guarda solo el índice y lee el texto
+    desde registros. Si el índice no existía se llena en bloque.
+    """
+    exists = con.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).fetchone()
+    con.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            detalle,
+            content='{TABLE}',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+    """)
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TABLE}_fts_ai AFTER INSERT ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, detalle) VALUES (new.id, new.detalle);
+        END;
+    """)
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TABLE}_fts_ad AFTER DELETE ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, detalle) VALUES ('delete', old.id, old.detalle);
+        END;
+    """)
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {TABLE}_fts_au AFTER UPDATE OF detalle ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, detalle) VALUES ('delete', old.id, old.detalle);
+            INSERT INTO {FTS_TABLE}(rowid, detalle) VALUES (new.id, new.detalle);
+        END;
+    """)
+    if rebuild or not exists:
+        con.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+# Dimensión del resumen → expresión sobre una fila de registros ({row} es new u old)
+SUMMARY_DIMENSIONS = {
+    "direccion_regional": "{row}.direccion_regional",
+    "item_monitoreo": "{row}.item_monitoreo",
+    "estado": "coalesce({row}.estado, 'Sin estado')",
+    "mes": "substr({row}.fecha_reunion, 1, 7)",
+}
+SUMMARY_COLUMNS = "direccion_regional, item_monitoreo, estado, fecha_reunion, deleted_at"
+
+def _summary_upsert(row, delta):
+    values = ", ".join(
+        f"('{dimension}', {expression.format(row=row)}, {delta})"
+        for dimension, expression in SUMMARY_DIMENSIONS.items()
+    )
+    return (
+        f"INSERT INTO {SUMMARY_TABLE} (dimension, valor, total) VALUES {values} "
+        f"ON CONFLICT(dimension, valor) DO UPDATE SET total = total + excluded.total;"
+    )
+
+def rebuild_summary(con):
+    """Recalcula en bloque el resumen a partir de los registros vigentes"""
+    con.execute(f"DELETE FROM {SUMMARY_TABLE}")
+    con.execute(f"INSERT INTO {SUMMARY_TABLE} (dimension, valor, total) " + " UNION ALL ".join(
+        f"SELECT '{dimension}', {expression.format(row=TABLE)}, COUNT(*) "
+        f"FROM {TABLE} WHERE deleted_at IS NULL GROUP BY 2"
+        for dimension, expression in SUMMARY_DIMENSIONS.items()
+    ))
+
+def create_summary_table(con, rebuild=False):
+    """Tabla de conteos por región, ítem, estado y mes de la reunión.
+
+    Los triggers la mantienen al día fila a fila (solo cuentan registros sin
+    marca de eliminación), así el panel de resumen lee un puñado de grupos en
+    lugar de recorrer registros. Si la tabla no existía se llena en bloque.
+    """
+    exists = con.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (SUMMARY_TABLE,)).fetchone()
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE}(
+            dimension TEXT NOT NULL,
+            valor TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (dimension, valor)
+        ) WITHOUT ROWID;
+    """)
+    discard_empty = f"DELETE FROM {SUMMARY_TABLE} WHERE total <= 0;"
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {SUMMARY_TABLE}_ai AFTER INSERT ON {TABLE}
+        WHEN new.deleted_at IS NULL BEGIN
+            {_summary_upsert("new", 1)}
+        END;
+    """)
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {SUMMARY_TABLE}_ad AFTER DELETE ON {TABLE}
+        WHEN old.deleted_at IS NULL BEGIN
+            {_summary_upsert("old", -1)}
+            {discard_empty}
+        END;
+    """)
+    # Una actualización (o una marca de eliminación) resta la fila anterior y suma la nueva
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {SUMMARY_TABLE}_au_old AFTER UPDATE OF {SUMMARY_COLUMNS} ON {TABLE}
+        WHEN old.deleted_at IS NULL BEGIN
+            {_summary_upsert("old", -1)}
+            {discard_empty}
+        END;
+    """)
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {SUMMARY_TABLE}_au_new AFTER UPDATE OF {SUMMARY_COLUMNS} ON {TABLE}
+        WHEN new.deleted_at IS NULL BEGIN
+            {_summary_upsert("new", 1)}
+        END;
+    """)
+    if rebuild or not exists:
+        rebuild_summary(con)
+
+def _sql_values(values):
+    return ", ".join("'" + v.replace("'", "''") + "'" for v in values)
+
+# Campos cuyo cambio queda en el historial, en el orden en que se muestran
+HISTORY_FIELDS = ["direccion_regional", "item_monitoreo", "detalle", "estado", "plazo_dias", "fecha_reunion", "deleted_at"]
+
+def _history_insert(operation, old, new):
+    """INSERT del historial con solo los campos que cambiaron, como {campo: [antes, después]}.
+
+    old o new pueden ser None (alta o borrado); si nada cambió no se inserta.
+    """
+    values = " UNION ALL ".join(
+        f"SELECT '{field}' AS campo, {f'{old}.{field}' if old else 'NULL'} AS antes, "
+        f"{f'{new}.{field}' if new else 'NULL'} AS despues"
+        for field in HISTORY_FIELDS
+    )
+    row = new or old
+    return (
+        f"INSERT INTO {HISTORY_TABLE} (record_id, generacion, operacion, cambios) "
+        f"SELECT {row}.id, (SELECT version FROM {VERSIONS_TABLE} WHERE tabla = '{ID_GENERATION}'), {operation}, "
+        f"json_group_object(campo, json_array(antes, despues)) "
+        f"FROM ({values}) WHERE antes IS NOT despues HAVING count(*) > 0;"
+    )
+
+def create_history_table(con):
+    """Historial de cambios por registro, llenado por triggers.
+
+    Cada fila guarda solo los campos que cambiaron. Las filas no se
+    modifican; solo purge_history borra las más antiguas. Como una
+    importación reinicia los ids, cada fila lleva la generación de ids
+    vigente y el historial de un registro se consulta dentro de ella.
+    """
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {HISTORY_TABLE}(
+            id INTEGER PRIMARY KEY,
+            record_id INTEGER NOT NULL,
+            generacion INTEGER NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+            operacion TEXT NOT NULL,
+            cambios TEXT NOT NULL
+        );
+    """)
+    con.execute(f"CREATE INDEX IF NOT EXISTS idx_{HISTORY_TABLE}_registro ON {HISTORY_TABLE}(record_id, changed_at)")
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {HISTORY_TABLE}_inmutable BEFORE UPDATE ON {HISTORY_TABLE} BEGIN
+            SELECT RAISE(ABORT, 'El historial no se puede modificar');
+        END;
+    """)
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {HISTORY_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+            {_history_insert("'alta'", None, "new")}
+        END;
+    """)
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {HISTORY_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN
+            {_history_insert(
+                "CASE WHEN old.deleted_at IS NULL AND new.deleted_at IS NOT NULL THEN 'eliminación' "
+                "WHEN old.deleted_at IS NOT NULL AND new.deleted_at IS NULL THEN 'restauración' "
+                "ELSE 'modificación' END",
+                "old", "new"
+            )}
+        END;
+    """)
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {HISTORY_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+            {_history_insert(
+                f"CASE WHEN EXISTS (SELECT 1 FROM {VERSIONS_TABLE} WHERE tabla = '{ARCHIVING}') "
+                "THEN 'archivo' ELSE 'borrado' END",
+                "old", None
+            )}
+        END;
+    """)
+
+# Virtual: se recalcula al cambiar fecha_reunion o plazo_dias y solo ocupa espacio en los índices
+DUE_DATE_COLUMN = (
+    "fecha_vencimiento TEXT GENERATED ALWAYS AS "
+    "(date(fecha_reunion, '+' || plazo_dias || ' days')) VIRTUAL"
+)
+# Control optimista de concurrencia: toda escritura sobre una fila la incrementa
+ROW_VERSION_COLUMN = "row_version INTEGER NOT NULL DEFAULT 1"
+NEXT_ROW_VERSION = "row_version = row_version + 1"
+# Las consultas deben repetir esta condición tal cual para usar los índices parciales
+OPEN_CONDITION = f"deleted_at IS NULL AND coalesce(estado, '') NOT IN ({_sql_values(CLOSED_STATES)})"
+
+def create_records_table(con, name=TABLE):
+    """Crea la tabla de registros con el esquema vigente.
+
+    Los CHECK copian los catálogos REGIONES, ITEMS_MONITOREO y ESTADOS:
+    si un catálogo cambia hace falta una migración que reconstruya la tabla.
+    """
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name}(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            direccion_regional TEXT NOT NULL CHECK (direccion_regional IN ({_sql_values(REGIONES)})),
+            item_monitoreo TEXT NOT NULL CHECK (item_monitoreo IN ({_sql_values(ITEMS_MONITOREO)})),
+            detalle TEXT NOT NULL,
+            estado TEXT CHECK (estado IS NULL OR estado IN ({_sql_values(ESTADOS)})),
+            plazo_dias INTEGER NOT NULL DEFAULT 0 CHECK (plazo_dias >= 0),
+            fecha_reunion TEXT NOT NULL CHECK (date(fecha_reunion) IS fecha_reunion),
+            deleted_at TEXT,
+            {DUE_DATE_COLUMN},
+            {ROW_VERSION_COLUMN}
+        );
+    """)
+
+def create_records_views(con):
+    """Vistas de registros vigentes y de vencimientos"""
+    con.execute(f"CREATE VIEW IF NOT EXISTS {ACTIVE_VIEW} AS SELECT * FROM {TABLE} WHERE deleted_at IS NULL")
+    con.execute(f"""
+        CREATE VIEW IF NOT EXISTS {DUE_VIEW} AS
+        SELECT *,
+            CASE WHEN fecha_vencimiento < date('now', 'localtime') THEN 'Vencido' ELSE 'Por vencer' END AS situacion
+        FROM {TABLE} WHERE {OPEN_CONDITION}
+    """)
+
+def drop_records_views(con):
+    # Las vistas impedirían renombrar o reconstruir registros
+    con.execute(f"DROP VIEW IF EXISTS {ACTIVE_VIEW}")
+    con.execute(f"DROP VIEW IF EXISTS {DUE_VIEW}")
+
+def create_versions_table(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE}(
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+    """)
+    # La versión parte de un valor aleatorio para que una base recreada
+    # desde cero no reutilice versiones ya vistas por la caché
+    con.execute(
+        f"INSERT OR IGNORE INTO {VERSIONS_TABLE} (tabla, version) VALUES (?, abs(random() % 1000000000000))",
+        (TABLE,)
+    )
+    con.execute(f"INSERT OR IGNORE INTO {VERSIONS_TABLE} (tabla, version) VALUES (?, 1)", (ID_GENERATION,))
+
+def create_sync_table(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SYNC_TABLE}(
+            archivo TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            tamano INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            sincronizado_en TEXT NOT NULL DEFAULT (datetime('now')),
+            historial_id INTEGER
+        );
+    """)
+
+def create_partitions_table(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {PARTITIONS_TABLE}(
+            anio INTEGER PRIMARY KEY,
+            archivo TEXT NOT NULL,
+            filas INTEGER NOT NULL,
+            max_id INTEGER,
+            archivado_en TEXT NOT NULL DEFAULT (datetime('now'))
+        );
+    """)
+
+def create_records_schema(con):
+    """Tabla, índices, vista e índice de búsqueda en su versión vigente"""
+    create_records_table(con)
+    create_records_indexes(con)
+    create_records_views(con)
+    create_search_index(con)
+    create_summary_table(con)
+    create_versions_table(con)
+    create_history_table(con)
+    create_sync_table(con)
+    create_partitions_table(con)
+
+# =========================
+# Migraciones (PRAGMA user_version)
+# =========================
+RECORD_CATALOGS = {"direccion_regional": REGIONES, "item_monitoreo": ITEMS_MONITOREO, "estado": ESTADOS}
+CATALOG_FALLBACKS = {"item_monitoreo": "Otros"}
+
+class MigrationError(RuntimeError):
+    pass
+
+def _migration_1_soft_delete(con):
+    """Tabla de versiones y columna deleted_at"""
+    columns = {row[1] for row in con.execute(f"PRAGMA table_info({TABLE})")}
+    if "deleted_at" not in columns:
+        con.execute(f"ALTER TABLE {TABLE} ADD COLUMN deleted_at TEXT")
+    create_versions_table(con)
+
+def _migration_2_typed_columns(con):
+    """Reconstruye registros con CHECK de catálogos y fecha validada.
+
+    También crea los índices, la vista de vigentes y el índice de búsqueda.
+
+    Los valores se llevan a su forma canónica del catálogo ("Bío-Bío" →
+    "Biobío", "Tema: Otros" → "Otros"); si alguno no se puede resolver la
+    migración se detiene sin modificar la base.
+    """
+    import pandas as pd
+    from excel_io import IMPORT_COLUMNS, canonicalize
+
+    df = pd.read_sql_query(f"SELECT * FROM {TABLE}", con)
+    df["direccion_regional"] = canonicalize(df["direccion_regional"], REGIONES)
+    df["item_monitoreo"] = canonicalize(df["item_monitoreo"], ITEMS_MONITOREO).fillna(CATALOG_FALLBACKS["item_monitoreo"])
+    estado_raw = df["estado"].astype("string").str.strip().replace("", pd.NA)
+    df["estado"] = canonicalize(estado_raw, ESTADOS)
+    df["plazo_dias"] = pd.to_numeric(df["plazo_dias"], errors="coerce").fillna(0).clip(lower=0).astype("int64")
+    df["fecha_reunion"] = pd.to_datetime(df["fecha_reunion"], format="%Y-%m-%d", errors="coerce").dt.strftime("%Y-%m-%d")
+
+    invalid = (
+        df["direccion_regional"].isna()
+        | (estado_raw.notna() & df["estado"].isna())
+        | df["fecha_reunion"].isna()
+    )
+    if invalid.any():
+        raise MigrationError(
+            "No se pudo migrar la tabla registros: valores fuera de catálogo o fechas inválidas "
+            f"en los id {', '.join(map(str, df.loc[invalid, 'id'].head(20)))}"
+        )
+
+    seq = con.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (TABLE,)).fetchone()
+    drop_records_views(con)
+    create_records_table(con, f"{TABLE}_nueva")
+    df["estado"] = df["estado"].astype(object).where(df["estado"].notna(), None)
+    columns = ["id"] + IMPORT_COLUMNS + ["deleted_at"]
+    con.executemany(
+        f"INSERT INTO {TABLE}_nueva ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        df[columns].astype(object).where(df[columns].notna(), None).itertuples(index=False, name=None)
+    )
+    con.execute(f"DROP TABLE {TABLE}")
+    con.execute(f"ALTER TABLE {TABLE}_nueva RENAME TO {TABLE}")
+    if seq:
+        con.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?", (seq[0], TABLE))
+    create_records_indexes(con)
+    create_records_views(con)
+    create_search_index(con, rebuild=True)
+    bump_table_version(con)
+
+def _migration_3_summary_table(con):
+    """Tabla de resumen mantenida por triggers"""
+    create_summary_table(con, rebuild=True)
+
+def _migration_4_due_date(con):
+    """Columna generada fecha_vencimiento, sus índices y la vista de vencimientos"""
+    columns = {row[1] for row in con.execute(f"PRAGMA table_xinfo({TABLE})")}
+    if "fecha_vencimiento" not in columns:
+        con.execute(f"ALTER TABLE {TABLE} ADD COLUMN {DUE_DATE_COLUMN}")
+    create_records_indexes(con)
+    create_records_views(con)
+
+def _migration_5_row_version(con):
+    """Columna row_version para detectar ediciones concurrentes"""
+    columns = {row[1] for row in con.execute(f"PRAGMA table_xinfo({TABLE})")}
+    if "row_version" not in columns:
+        con.execute(f"ALTER TABLE {TABLE} ADD COLUMN {ROW_VERSION_COLUMN}")
+
+def _migration_6_history(con):
+    """Historial de cambios por registro"""
+    create_versions_table(con)
+    create_history_table(con)
+
+def _migration_7_file_sync(con):
+    """Huellas de archivos para la sincronización incremental"""
+    create_sync_table(con)
+
+def _migration_8_partitions(con):
+    """Registro de años archivados; el historial distingue archivo de borrado"""
+    con.execute(f"DROP TRIGGER IF EXISTS {HISTORY_TABLE}_ad")
+    create_history_table(con)
+    create_partitions_table(con)
+
+MIGRATIONS = [
+    (1, _migration_1_soft_delete),
+    (2, _migration_2_typed_columns),
+    (3, _migration_3_summary_table),
+    (4, _migration_4_due_date),
+    (5, _migration_5_row_version),
+    (6, _migration_6_history),
+    (7, _migration_7_file_sync),
+    (8, _migration_8_partitions),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(con):
+    """Lleva la base a SCHEMA_VERSION dentro de la transacción en curso.
+
+    Una base nueva recibe directamente el esquema vigente; una existente
+    aplica, en orden, las migraciones posteriores a su user_version.
+    """
+    current = con.execute("PRAGMA user_version").fetchone()[0]
+    if current >= SCHEMA_VERSION:
+        return current
+    has_table = con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE,)).fetchone()
+    if not has_table:
+        create_records_schema(con)
+    else:
+        for version, migration in MIGRATIONS:
+            if version > current:
+                migration(con)
+    con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return SCHEMA_VERSION
+
+@timed()
+def init_db():
+    with get_pool(DB_PATH).connection(write=True) as con:
+        migrate(con)
+        drop_stale_staging(con)
+
+def bump_table_version(con):
+    """Incrementa la versión de la tabla dentro de la transacción en curso"""
+    con.execute(f"UPDATE {VERSIONS_TABLE} SET version = version + 1 WHERE tabla = ?", (TABLE,))
+
+@timed()
+def get_table_version():
+    """Versión actual de la tabla de registros, compartida entre sesiones y procesos"""
+    with get_pool(DB_PATH).connection() as con:
+        row = con.execute(f"SELECT version FROM {VERSIONS_TABLE} WHERE tabla = ?", (TABLE,)).fetchone()
+        return row[0] if row else 0
+
+# =========================
+# Registros
+# =========================
+def delete_record(record_id):
+    return delete_records([record_id])
+
+@timed()
+def delete_records(record_ids, soft=SOFT_DELETE):
+    """Elimina varios registros en una sola transacción.
+
+    Con soft=True solo se marca deleted_at (se puede deshacer con
+    restore_records); con soft=False se borran las filas.
+    """
+    return write(_delete_records, json.dumps([int(i) for i in record_ids]), soft)
+
+def _delete_records(con, ids, soft):
+    if soft:
+        cur = con.execute(
+            f"UPDATE {TABLE} SET deleted_at = datetime('now'), {NEXT_ROW_VERSION} "
+            f"WHERE deleted_at IS NULL AND id IN (SELECT value FROM json_each(?))",
+            (ids,)
+        )
+    else:
+        cur = con.execute(f"DELETE FROM {TABLE} WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+    bump_table_version(con)
+    return cur.rowcount
+
+@timed()
+def restore_records(record_ids):
+    """Deshace una eliminación lógica"""
+    return write(_restore_records, json.dumps([int(i) for i in record_ids]))
+
+def _restore_records(con, ids):
+    cur = con.execute(
+        f"UPDATE {TABLE} SET deleted_at = NULL, {NEXT_ROW_VERSION} "
+        f"WHERE deleted_at IS NOT NULL AND id IN (SELECT value FROM json_each(?))",
+        (ids,)
+    )
+    bump_table_version(con)
+    return cur.rowcount
+
+BATCH_UPDATE_COLUMNS = {"direccion_regional", "item_monitoreo", "detalle", "estado", "plazo_dias", "fecha_reunion"}
+
+@timed()
+def update_records(record_ids, changes):
+    """Aplica los mismos cambios a varios registros en una sola transacción"""
+    unknown = set(changes) - BATCH_UPDATE_COLUMNS
+    if unknown:
+        raise ValueError(f"Columnas no válidas: {', '.join(sorted(unknown))}")
+    if not changes:
+        return 0
+    columns = sorted(changes)
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    params = [changes[column] for column in columns] + [json.dumps([int(i) for i in record_ids])]
+    return write(_update_records, assignments, params)
+
+def _update_records(con, assignments, params):
+    cur = con.execute(
+        f"UPDATE {TABLE} SET {assignments}, {NEXT_ROW_VERSION} "
+        f"WHERE deleted_at IS NULL AND id IN (SELECT value FROM json_each(?))",
+        params
+    )
+    bump_table_version(con)
+    return cur.rowcount
+
+@timed()
+def purge_deleted_records(older_than_days=SOFT_DELETE_RETENTION_DAYS):
+    """Compacta la tabla borrando definitivamente las marcas antiguas"""
+    with get_pool(DB_PATH).connection(write=True) as con:
+        cur = con.execute(
+            f"DELETE FROM {TABLE} WHERE deleted_at IS NOT NULL AND deleted_at < datetime('now', ?)",
+            (f"-{int(older_than_days)} days",)
+        )
+        if cur.rowcount:
+            bump_table_version(con)
+        return cur.rowcount
+
+@timed()
+def purge_history(older_than_days=HISTORY_RETENTION_DAYS):
+    """Borra del historial los cambios más antiguos que older_than_days"""
+    with get_pool(DB_PATH).connection(write=True) as con:
+        cur = con.execute(
+            f"DELETE FROM {HISTORY_TABLE} WHERE changed_at < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)",
+            (f"-{int(older_than_days)} days",)
+        )
+        return cur.rowcount
+
+RECORD_FIELDS = ["id", "direccion_regional", "item_monitoreo", "detalle", "estado", "plazo_dias", "fecha_reunion", "row_version"]
+
+@timed()
+def get_record(record_id):
+    """Obtiene un registro específico por ID, con su row_version"""
+    with get_pool(DB_PATH).connection() as con:
+        return _fetch_record(con, record_id)
+
+def _fetch_record(con, record_id):
+    cur = con.execute(f"SELECT {', '.join(RECORD_FIELDS)} FROM {ACTIVE_VIEW} WHERE id = ?", (record_id,))
+    result = cur.fetchone()
+    return dict(zip(RECORD_FIELDS, result)) if result else None
+
+class ConflictError(RuntimeError):
+    """El registro cambió (o se eliminó) desde que se leyó.
+
+    current es el registro vigente, o None si ya no existe.
+    """
+
+    def __init__(self, record_id, current):
+        super().__init__(f"El registro #{record_id} fue modificado por otra persona")
+        self.record_id = record_id
+        self.current = current
+
+@timed()
+def update_record(record_id, reg, expected_version=None):
+    """Actualiza un registro existente.
+
+    Con expected_version, el UPDATE solo se aplica si la fila conserva esa
+    row_version; si no, no escribe nada y lanza ConflictError con el
+    registro vigente. Sin expected_version sobrescribe sin comprobar.
+    """
+    return write(_update_record, record_id, reg, expected_version)
+
+def _update_record(con, record_id, reg, expected_version):
+    condition = "id = ?" if expected_version is None else "id = ? AND row_version = ? AND deleted_at IS NULL"
+    params = [record_id] if expected_version is None else [record_id, expected_version]
+    cur = con.execute(f"""
+        UPDATE {TABLE} 
+        SET direccion_regional = ?, item_monitoreo = ?, detalle = ?, 
+            estado = ?, plazo_dias = ?, fecha_reunion = ?, {NEXT_ROW_VERSION}
+        WHERE {condition}
+    """, (
+        reg["direccion_regional"], reg["item_monitoreo"], reg["detalle"],
+        reg["estado"], reg["plazo_dias"], reg["fecha_reunion"], *params
+    ))
+    if cur.rowcount == 0 and expected_version is not None:
+        raise ConflictError(record_id, _fetch_record(con, record_id))
+    bump_table_version(con)
+    return True
+
+def merge_records(base, mine, theirs):
+    """Combinación a tres bandas de los campos editables.
+
+    Toma de theirs lo que solo cambió ahí y de mine lo que solo cambió
+    aquí. Devuelve (combinado, campos en conflicto); en los conflictos,
+    campos que ambos cambiaron de forma distinta, se conserva mine.
+    """
+    merged, conflicts = {}, []
+    for field in BATCH_UPDATE_COLUMNS:
+        if mine[field] == base[field]:
+            merged[field] = theirs[field]
+        else:
+            merged[field] = mine[field]
+            if theirs[field] not in (base[field], mine[field]):
+                conflicts.append(field)
+    return merged, sorted(conflicts)
+
+@timed()
+def insert_record(reg):
+    return write(_insert_record, reg)
+
+def _insert_record(con, reg):
+    cur = con.execute(f"""
+        INSERT INTO {TABLE}
+        (direccion_regional, item_monitoreo, detalle, estado, plazo_dias, fecha_reunion)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        reg["direccion_regional"], reg["item_monitoreo"], reg["detalle"],
+        reg["estado"], reg["plazo_dias"], reg["fecha_reunion"]
+    ))
+    bump_table_version(con)
+    return cur.lastrowid
+
+def database_stats(db_path=None):
+    """Conteos y tamaño de la base, sin pandas (lo usa el CLI)"""
+    db_path = Path(db_path or DB_PATH)
+    with get_pool(db_path).connection() as con:
+        active, deleted = con.execute(
+            f"SELECT COUNT(*) FILTER (WHERE deleted_at IS NULL), COUNT(*) FILTER (WHERE deleted_at IS NOT NULL) FROM {TABLE}"
+        ).fetchone()
+        overdue = con.execute(
+            f"SELECT COUNT(*) FROM {TABLE} WHERE {OPEN_CONDITION} AND fecha_vencimiento < date('now', 'localtime')"
+        ).fetchone()[0]
+        summary = {}
+        for dimension, valor, total in con.execute(
+            f"SELECT dimension, valor, total FROM {SUMMARY_TABLE} ORDER BY dimension, valor"
+        ):
+            summary.setdefault(dimension, {})[valor] = total
+        archived = dict(con.execute(f"SELECT anio, filas FROM {PARTITIONS_TABLE} ORDER BY anio"))
+        return {
+            "base": str(db_path),
+            "version_esquema": con.execute("PRAGMA user_version").fetchone()[0],
+            "bytes": sum(p.stat().st_size for p in db_path.parent.glob(db_path.name + "*") if p.is_file()),
+            "vigentes": active,
+            "eliminados": deleted,
+            "vencidos": overdue,
+            "resumen": summary,
+            "archivados": archived,
+        }
+
+@timed()
+def compact_database(older_than_days=SOFT_DELETE_RETENTION_DAYS):
+    """Purga marcas e historial antiguos, optimiza la búsqueda y compacta el archivo.
+
+    Devuelve (filas_purgadas, bytes_antes, bytes_después).
+    """
+    def size():
+        return sum(p.stat().st_size for p in DB_PATH.parent.glob(DB_PATH.name + "*") if p.is_file())
+
+    before = size()
+    purged = purge_deleted_records(older_than_days)
+    purge_history()
+    with get_pool(DB_PATH).connection(write=True) as con:
+        drop_stale_staging(con)
+    with get_pool(DB_PATH).connection() as con:
+        con.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        con.execute("PRAGMA optimize")
+        con.execute("VACUUM")
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return purged, before, size()
+
+# =========================
+# Particiones por año
+# =========================
+# La tabla activa guarda el año en curso y los compromisos abiertos. Los
+# registros cerrados de un año terminado pasan a <base>_<año>.db, que solo
+# se adjunta (ATTACH en solo lectura) cuando el rango de fechas de una
+# consulta lo alcanza; sin filtro de fechas solo se lee la tabla activa.
+def archive_path(db_path, year):
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}_{int(year)}{db_path.suffix}")
+
+def archive_uri(path):
+    # immutable: el archivo nunca se modifica en su lugar, archive_year lo reemplaza entero
+    return Path(path).resolve().as_uri() + "?mode=ro&immutable=1"
+
+def archived_years(con, db_path, desde=None, hasta=None):
+    """[(año, ruta)] de los años archivados, opcionalmente dentro de [desde, hasta]"""
+    rows = con.execute(
+        f"SELECT anio, archivo FROM {PARTITIONS_TABLE} WHERE anio BETWEEN ? AND ? ORDER BY anio",
+        (desde.year if desde else 0, hasta.year if hasta else 9999)
+    ).fetchall()
+    return [(year, Path(db_path).with_name(name)) for year, name in rows]
+
+@contextmanager
+def attached_partitions(con, db_path, filters):
+    """Adjunta los años archivados que alcanza el rango de fechas de filters.
+
+    Devuelve los alias adjuntos (vacío sin filtro de fechas) y los separa al
+    salir, así cada consulta ve el archivo vigente de cada año.
+    """
+    aliases = []
+    try:
+        if filters.get("fecha_desde") or filters.get("fecha_hasta"):
+            for year, path in archived_years(con, db_path, filters.get("fecha_desde"), filters.get("fecha_hasta")):
+                con.execute(f"ATTACH DATABASE ? AS archivo_{year}", (archive_uri(path),))
+                aliases.append(f"archivo_{year}")
+        yield aliases
+    finally:
+        for alias in aliases:
+            con.execute(f"DETACH DATABASE {alias}")
+
+def archived_ids(con, db_path):
+    """Ids de todos los registros archivados, adjuntando un año a la vez"""
+    ids = set()
+    for year, path in archived_years(con, db_path):
+        con.execute(f"ATTACH DATABASE ? AS archivo_{year}", (archive_uri(path),))
+        try:
+            ids.update(row_id for (row_id,) in con.execute(f"SELECT id FROM archivo_{year}.{TABLE}"))
+        finally:
+            con.execute(f"DETACH DATABASE archivo_{year}")
+    return ids
+
+def list_partitions(db_path=None):
+    """Años archivados: [{"anio", "archivo", "filas", "archivado_en"}]"""
+    with get_pool(db_path or DB_PATH).connection() as con:
+        cur = con.execute(f"SELECT anio, archivo, filas, archivado_en FROM {PARTITIONS_TABLE} ORDER BY anio")
+        return [dict(zip(("anio", "archivo", "filas", "archivado_en"), row)) for row in cur]
+
+ARCHIVE_ATTEMPTS = 3  # Pasadas de archive_year si los registros cambian mientras se arma el archivo
+
+class ArchiveError(RuntimeError):
+    """Los registros del año cambiaron en cada intento de archivarlos"""
+
+def _build_archive(tmp_path, path, rows):
+    """Escribe en tmp_path el archivo anterior (si existe) más rows; devuelve (filas, max_id)"""
+    fields = ", ".join(RECORD_FIELDS)
+    open(tmp_path, "wb").close()  # Vacío también en un reintento
+    archive = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        create_records_table(archive)
+        create_records_indexes(archive)
+        if path.exists():
+            archive.execute("ATTACH DATABASE ? AS anterior", (archive_uri(path),))
+        archive.execute("BEGIN")
+        if path.exists():
+            archive.execute(
+                f"INSERT INTO {TABLE} ({fields}) SELECT {fields} FROM anterior.{TABLE} "
+                f"WHERE id NOT IN (SELECT value FROM json_each(?))",
+                (json.dumps([row[0] for row in rows]),)
+            )
+        archive.executemany(f"INSERT INTO {TABLE} ({fields}) VALUES ({', '.join('?' * len(RECORD_FIELDS))})", rows)
+        total, max_id = archive.execute(f"SELECT COUNT(*), max(id) FROM {TABLE}").fetchone()
+        archive.execute("COMMIT")
+    finally:
+        archive.close()
+    # mkstemp lo crea 0600; la escritura se impide con mode=ro&immutable=1 (archive_uri),
+    # no con permisos: Windows no reemplaza archivos de solo lectura
+    os.chmod(tmp_path, 0o644)
+    return total, max_id
+
+@timed()
+def archive_year(year):
+    """Mueve a <base>_<año>.db los registros cerrados de un año terminado.
+
+    Pasan los registros vigentes de ese año con estado Completado o
+    Cancelado; los compromisos abiertos siguen en la tabla activa y se
+    archivan en una pasada posterior, que rehace el archivo con las filas
+    anteriores más las nuevas. Los eliminados esperan la purga.
+
+    El archivo se arma fuera de la transacción de escritura, así las demás
+    escrituras no esperan la copia. La transacción solo borra las filas
+    copiadas cuyo row_version no cambió y reemplaza el archivo justo antes
+    del COMMIT; si alguna cambió entretanto, se vuelve a armar. Devuelve la
+    cantidad de registros movidos.
+    """
+    year = int(year)
+    if year >= date.today().year:
+        raise ValueError(f"El año {year} no ha terminado; solo se archivan años cerrados")
+    path = archive_path(DB_PATH, year)
+    pool = get_pool(DB_PATH)
+    condition = (
+        f"deleted_at IS NULL AND estado IN ({_sql_values(CLOSED_STATES)}) "
+        f"AND fecha_reunion >= '{year}-01-01' AND fecha_reunion < '{year + 1}-01-01'"
+    )
+    partition_query = f"SELECT archivo, filas, max_id FROM {PARTITIONS_TABLE} WHERE anio = ?"
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.stem}-", suffix=path.suffix, dir=path.parent)
+    os.close(fd)
+    try:
+        for _ in range(ARCHIVE_ATTEMPTS):
+            with pool.connection() as con:
+                rows = con.execute(f"SELECT {', '.join(RECORD_FIELDS)} FROM {TABLE} WHERE {condition}").fetchall()
+                partition = con.execute(partition_query, (year,)).fetchone()
+            if not rows:
+                return 0
+            total, max_id = _build_archive(tmp_path, path, rows)
+
+            with pool.connection(write=True) as con:
+                if con.execute(partition_query, (year,)).fetchone() != partition:
+                    con.rollback()  # Otro proceso archivó el mismo año entretanto
+                    continue
+                con.execute(f"INSERT INTO {VERSIONS_TABLE} (tabla, version) VALUES (?, 1)", (ARCHIVING,))
+                deleted = con.execute(
+                    f"DELETE FROM {TABLE} WHERE {condition} AND (id, row_version) IN "
+                    f"(SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?))",
+                    (json.dumps([(row[0], row[-1]) for row in rows]),)
+                ).rowcount
+                if deleted != len(rows):
+                    con.rollback()  # Alguna fila copiada se editó o eliminó: el archivo quedó viejo
+                    continue
+                con.execute(f"DELETE FROM {VERSIONS_TABLE} WHERE tabla = ?", (ARCHIVING,))
+                con.execute(
+                    f"INSERT OR REPLACE INTO {PARTITIONS_TABLE} (anio, archivo, filas, max_id) VALUES (?, ?, ?, ?)",
+                    (year, path.name, total, max_id)
+                )
+                bump_table_version(con)
+                if path.exists():
+                    # Archivo de solo lectura de una versión anterior
+                    os.chmod(path, 0o644)
+                os.replace(tmp_path, path)
+            return len(rows)
+        raise ArchiveError(f"Los registros de {year} cambiaron en cada intento de archivarlos; vuelva a intentarlo")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# =========================
+# Consultas
+# =========================
+# Las funciones load_* leen directamente de la base, sin caché: la app las
+# envuelve con st.cache_data por versión de la tabla y el CLI las usa tal cual.
+def load_count(db_path):
+    with get_pool(db_path).connection() as con:
+        cur = con.execute(f"SELECT COUNT(*) FROM {ACTIVE_VIEW}")
+        return int(cur.fetchone()[0])
+
+def load_summary(db_path):
+    """Conteos por dimensión desde la tabla de resumen.
+
+    Devuelve {dimensión: Series valor → total}; el costo depende de la
+    cantidad de grupos, no de la cantidad de registros.
+    """
+    import pandas as pd
+
+    with get_pool(db_path).connection() as con:
+        df = pd.read_sql_query(
+            f"SELECT dimension, valor, total FROM {SUMMARY_TABLE} ORDER BY dimension, valor", con
+        )
+    return {
+        dimension: df.loc[df["dimension"] == dimension].set_index("valor")["total"].rename("Registros")
+        for dimension in SUMMARY_DIMENSIONS
+    }
+
+DUE_LIMIT = 200
+DUE_COLUMNS = """
+        id,
+        direccion_regional AS "Dirección Regional",
+        item_monitoreo AS "Ítem Monitoreo",
+        detalle AS "Detalle",
+        estado AS "Estado",
+        strftime('%d-%m-%Y', fecha_reunion) AS "Fecha Reunión",
+        strftime('%d-%m-%Y', fecha_vencimiento) AS "Vence",
+        CAST(julianday(?) - julianday(fecha_vencimiento) AS INTEGER) AS "Días de atraso"
+"""
+
+def load_due_records(db_path, region, days_ahead, today, limit):
+    """Compromisos abiertos vencidos o que vencen en los próximos days_ahead días.
+
+    Ordenados por fecha de vencimiento (los más atrasados primero); con region
+    la consulta recorre solo el tramo de esa región del índice parcial.
+    """
+    import pandas as pd
+
+    today_sql = today.strftime("%Y-%m-%d")
+    where, params = f"{OPEN_CONDITION} AND fecha_vencimiento <= date(?, ?)", [today_sql, f"+{int(days_ahead)} days"]
+    if region:
+        where += " AND direccion_regional = ?"
+        params.append(region)
+    with get_pool(db_path).connection() as con:
+        df = pd.read_sql_query(
+            f"SELECT {DUE_COLUMNS} FROM {TABLE} WHERE {where} ORDER BY fecha_vencimiento, id LIMIT ?",
+            con, params=[today_sql] + params + [int(limit)]
+        )
+    df.insert(1, "Situación", df["Días de atraso"].gt(0).map({True: "Vencido", False: "Por vencer"}))
+    return df
+
+def load_due_counts(db_path, days_ahead, today):
+    """Cantidad de compromisos vencidos y por vencer en cada Dirección Regional"""
+    import pandas as pd
+
+    today_sql = today.strftime("%Y-%m-%d")
+    with get_pool(db_path).connection() as con:
+        df = pd.read_sql_query(
+            f"""
+            SELECT direccion_regional AS "Dirección Regional",
+                SUM(fecha_vencimiento < ?) AS "Vencidos",
+                SUM(fecha_vencimiento >= ?) AS "Por vencer"
+            FROM {TABLE}
+            WHERE {OPEN_CONDITION} AND fecha_vencimiento <= date(?, ?)
+            GROUP BY direccion_regional
+            """,
+            con, params=[today_sql, today_sql, today_sql, f"+{int(days_ahead)} days"]
+        )
+    return df.set_index("Dirección Regional").reindex(REGIONES).dropna().astype("int64")
+
+HISTORY_LIMIT = 200  # Cambios más recientes que se muestran por registro
+HISTORY_LABELS = {
+    "direccion_regional": "Dirección Regional",
+    "item_monitoreo": "Ítem Monitoreo",
+    "detalle": "Detalle",
+    "estado": "Estado",
+    "plazo_dias": "Plazo (días)",
+    "fecha_reunion": "Fecha Reunión",
+    "deleted_at": "Eliminado",
+}
+HISTORY_COLUMNS = ["Fecha", "Operación", "Campo", "Antes", "Después"]
+
+def fetch_history(db_path, record_id, limit=HISTORY_LIMIT):
+    """Cambios del registro en la generación de ids vigente, del más reciente al más antiguo.
+
+    Lee por el índice (record_id, changed_at), así que el costo no depende
+    del tamaño del historial. Devuelve filas (fecha, operación, {campo: [antes, después]}).
+    """
+    with get_pool(db_path).connection() as con:
+        rows = con.execute(f"""
+            SELECT datetime(changed_at, 'localtime'), operacion, cambios FROM {HISTORY_TABLE}
+            WHERE record_id = ?
+              AND generacion = (SELECT version FROM {VERSIONS_TABLE} WHERE tabla = '{ID_GENERATION}')
+            ORDER BY changed_at DESC, id DESC
+            LIMIT ?
+        """, (record_id, limit)).fetchall()
+    return [(changed_at, operation, json.loads(changes)) for changed_at, operation, changes in rows]
+
+def load_history(db_path, record_id, limit=HISTORY_LIMIT):
+    """Historial del registro con una fila por campo modificado"""
+    import pandas as pd
+
+    rows = [
+        (changed_at, operation, HISTORY_LABELS.get(field, field), before, after)
+        for changed_at, operation, changes in fetch_history(db_path, record_id, limit)
+        for field, (before, after) in sorted(changes.items(), key=lambda item: HISTORY_FIELDS.index(item[0]))
+    ]
+    # Antes y Después mezclan textos y números: se muestran como texto
+    return pd.DataFrame(rows, columns=HISTORY_COLUMNS).astype({"Antes": "string", "Después": "string"})
+
+RECORDS_COLUMNS = """
+        id,
+        direccion_regional AS "Dirección Regional",
+        item_monitoreo AS "Ítem Monitoreo",
+        detalle AS "Detalle",
+        estado AS "Estado",
+        plazo_dias AS "Plazo (días)",
+        strftime('%d-%m-%Y', fecha_reunion) AS "Fecha Reunión"
+"""
+RECORDS_QUERY = f"SELECT {RECORDS_COLUMNS} FROM {ACTIVE_VIEW} ORDER BY id ASC"
+DETAIL_PREVIEW_CHARS = 120  # Largo del Detalle en la grilla; el texto completo se lee con get_record
+RECORDS_PREVIEW_COLUMNS = RECORDS_COLUMNS.replace(
+    'detalle AS "Detalle"',
+    f"CASE WHEN length(detalle) > {DETAIL_PREVIEW_CHARS} "
+    f"THEN substr(detalle, 1, {DETAIL_PREVIEW_CHARS}) || '…' ELSE detalle END AS \"Detalle\""
+)
+# Columnas de catálogo cerrado: como category cada valor distinto se guarda una sola vez
+CATEGORY_COLUMNS = {"Dirección Regional": REGIONES, "Ítem Monitoreo": ITEMS_MONITOREO, "Estado": ESTADOS}
+
+def compact_records_frame(df):
+    """Pasa a category las columnas de catálogo del frame, sin copiar el resto"""
+    import pandas as pd
+
+    for column, catalog in CATEGORY_COLUMNS.items():
+        if column in df.columns:
+            df[column] = df[column].astype(pd.CategoricalDtype(catalog))
+    return df
+
+def load_all_records(db_path):
+    import pandas as pd
+
+    with get_pool(db_path).connection() as con:
+        return compact_records_frame(pd.read_sql_query(RECORDS_QUERY, con))
+
+PAGE_SIZES = [25, 50, 100, 200]
+SORT_COLUMNS = {
+    "N° Registro": "id",
+    "Fecha Reunión": "fecha_reunion",
+    "Dirección Regional": "direccion_regional",
+    "Ítem Monitoreo": "item_monitoreo",
+    "Estado": "estado",
+    "Plazo (días)": "plazo_dias",
+}
+
+def _records_where(filters):
+    """Cláusula WHERE y parámetros para los filtros de la tabla"""
+    clauses, params = [], []
+    for column in ("direccion_regional", "item_monitoreo", "estado"):
+        values = filters.get(column)
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if filters.get("fecha_desde"):
+        clauses.append("fecha_reunion >= ?")
+        params.append(filters["fecha_desde"].strftime("%Y-%m-%d"))
+    if filters.get("fecha_hasta"):
+        clauses.append("fecha_reunion <= ?")
+        params.append(filters["fecha_hasta"].strftime("%Y-%m-%d"))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def _records_from(filters, partitions=(), order="", limit=None):
+    """Origen filtrado de las consultas: la vista de vigentes o su unión con los años adjuntos.
+
+    Con order y limit cada parte de la unión ya viene ordenada y recortada
+    por su índice, así la página no ordena todos los registros del rango.
+    """
+    where, params = _records_where(filters)
+    if not partitions:
+        return f"{ACTIVE_VIEW}{where}", params
+    fields = ", ".join(RECORD_FIELDS)
+    top = f" ORDER BY {order} LIMIT {int(limit)}" if limit is not None else ""
+    arms = [f"SELECT * FROM (SELECT {fields} FROM main.{ACTIVE_VIEW}{where}{top})"]
+    arms += [f"SELECT * FROM (SELECT {fields} FROM {alias}.{TABLE}{where}{top})" for alias in partitions]
+    return f"({' UNION ALL '.join(arms)})", params * len(arms)
+
+def load_filtered_count(db_path, filters):
+    where, params = _records_where(filters)
+    with get_pool(db_path).connection() as con, attached_partitions(con, db_path, filters) as partitions:
+        sources = [ACTIVE_VIEW] + [f"{alias}.{TABLE}" for alias in partitions]
+        return sum(int(con.execute(f"SELECT COUNT(*) FROM {source}{where}", params).fetchone()[0]) for source in sources)
+
+def fetch_records_page(db_path, filters, sort_by="id", descending=False, page=1, page_size=PAGE_SIZES[1],
+                       columns=RECORDS_COLUMNS):
+    """Una página de registros filtrada y ordenada en SQLite: (columnas, filas).
+
+    filters admite listas para direccion_regional, item_monitoreo y estado,
+    y fechas para fecha_desde/fecha_hasta. Si el rango de fechas alcanza
+    años archivados, también se leen sus registros (solo lectura). Con
+    columns=RECORDS_PREVIEW_COLUMNS el Detalle llega recortado.
+    """
+    if sort_by not in SORT_COLUMNS.values():
+        raise ValueError(f"Columna de orden no válida: {sort_by}")
+    order = f"{sort_by} {'DESC' if descending else 'ASC'}, id {'DESC' if descending else 'ASC'}"
+    offset = (max(page, 1) - 1) * page_size
+    with get_pool(db_path).connection() as con, attached_partitions(con, db_path, filters) as partitions:
+        source, params = _records_from(filters, partitions, order, offset + page_size)
+        cur = con.execute(
+            f"SELECT {columns} FROM {source} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [page_size, offset]
+        )
+        return [d[0] for d in cur.description], cur.fetchall()
+
+def load_records_page(db_path, filters, sort_by, descending, page, page_size):
+    """Página para la grilla: catálogos como category y Detalle recortado"""
+    import pandas as pd
+
+    columns, rows = fetch_records_page(
+        db_path, filters, sort_by, descending, page, page_size, columns=RECORDS_PREVIEW_COLUMNS
+    )
+    return compact_records_frame(pd.DataFrame.from_records(rows, columns=columns))
+
+SEARCH_LIMIT = 50
+SEARCH_COLUMNS = ["id", "Dirección Regional", "Ítem Monitoreo", "Estado", "Fecha Reunión", "snippet"]
+# Marcadores de control para el snippet; se reemplazan por <mark> tras escapar el texto
+_MARK_START, _MARK_END = "\x02", "\x03"
+
+def fts_query(text):
+    """Convierte el texto del usuario en una consulta FTS5 segura (prefijos con AND)"""
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " ".join(f'"{t}"*' for t in terms if t)
+
+def load_search(db_path, query, limit=SEARCH_LIMIT):
+    """Coincidencias de una consulta FTS5 en las observaciones, por relevancia (bm25)"""
+    import pandas as pd
+
+    with get_pool(db_path).connection() as con:
+        return pd.read_sql_query(f"""
+            SELECT
+                r.id,
+                r.direccion_regional AS "Dirección Regional",
+                r.item_monitoreo AS "Ítem Monitoreo",
+                r.estado AS "Estado",
+                strftime('%d-%m-%Y', r.fecha_reunion) AS "Fecha Reunión",
+                snippet({FTS_TABLE}, 0, ?, ?, '…', 16) AS snippet
+            FROM {FTS_TABLE}
+            JOIN {ACTIVE_VIEW} r ON r.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, con, params=[_MARK_START, _MARK_END, query, limit])
+
+def mark_snippet(snippet, start="«", end="»"):
+    """Reemplaza los marcadores de coincidencia del snippet por start/end"""
+    return snippet.replace(_MARK_START, start).replace(_MARK_END, end)
+
+def highlight_snippet(snippet):
+    """HTML seguro del snippet con las coincidencias resaltadas"""
+    return mark_snippet(html.escape(snippet).replace("\n", " "), "<mark>", "</mark>")
+
+# =========================
+# Exportación e importación del Excel
+# =========================
+EXPORT_CHUNK_ROWS = 10_000
+EXPORT_FORMATS = {
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Arrow IPC", "application/vnd.apache.arrow.file"),
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")  # Requieren pyarrow
+# Los formatos columnares guardan la fecha tipada (ISO) y no como texto DD-MM-AAAA
+COLUMNAR_RECORDS_QUERY = RECORDS_QUERY.replace(
+    "strftime('%d-%m-%Y', fecha_reunion) AS", "fecha_reunion AS"
+)
+
+def available_export_formats():
+    """Formatos de EXPORT_FORMATS cuyas dependencias están instaladas"""
+    from importlib.util import find_spec
+
+    has_pyarrow = find_spec("pyarrow") is not None
+    return [fmt for fmt in EXPORT_FORMATS if has_pyarrow or fmt not in COLUMNAR_FORMATS]
+
+def export_format(path):
+    """Formato de exportación según la extensión de path"""
+    fmt = Path(path).suffix.lower().lstrip(".")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato no soportado: {Path(path).suffix or path} (use {', '.join(EXPORT_FORMATS)})")
+    return fmt
+
+def iter_record_rows(con, query=RECORDS_QUERY, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Filas vigentes en bloques de chunk_rows tuplas, sin armar un DataFrame"""
+    cursor = con.execute(query)
+    columns = [d[0] for d in cursor.description]
+    while rows := cursor.fetchmany(chunk_rows):
+        yield columns, rows
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ValueError("Parquet y Arrow requieren pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def _write_csv(con, f, chunk_rows):
+    import csv
+
+    text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    header = True
+    for columns, rows in iter_record_rows(con, chunk_rows=chunk_rows):
+        if header:
+            writer.writerow(columns)
+            header = False
+        writer.writerows(rows)
+    if header:
+        writer.writerow([d[0] for d in con.execute(RECORDS_QUERY + " LIMIT 0").description])
+    text.flush()
+    text.detach()  # No cerrar f al liberar el envoltorio
+
+def _write_columnar(con, f, fmt, chunk_rows):
+    pa = _require_pyarrow()
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    string_columns = ("Dirección Regional", "Ítem Monitoreo", "Detalle", "Estado")
+    schema = pa.schema(
+        [("id", pa.int64())]
+        + [(name, pa.string()) for name in string_columns]
+        + [("Plazo (días)", pa.int64()), ("Fecha Reunión", pa.date32())]
+    )
+    if fmt == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(f, schema, compression="zstd")
+    else:
+        writer = pyarrow.ipc.new_file(f, schema)
+    with writer:
+        for _, rows in iter_record_rows(con, COLUMNAR_RECORDS_QUERY, chunk_rows):
+            values = list(zip(*rows))
+            arrays = [pa.array(column, type=field.type) for column, field in zip(values[:-1], schema)]
+            arrays.append(pa.array(values[-1], type=pa.string()).cast(pa.date32()))
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+
+def write_records(pool, f, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Escribe los registros vigentes en el archivo binario f con el formato fmt.
+
+    CSV, Parquet y Arrow se escriben bloque a bloque desde el cursor, así que
+    la memoria no crece con la tabla; el xlsx se sigue armando completo.
+    Devuelve la marca del historial (history_mark) tomada antes de leer.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    with pool.connection() as con:
+        mark = history_mark(con)
+        if fmt == "xlsx":
+            import pandas as pd
+
+            df = pd.read_sql_query(RECORDS_QUERY, con)
+            with pd.ExcelWriter(f, engine="openpyxl") as writer:
+                df.to_excel(writer, index=False)
+        elif fmt == "csv":
+            _write_csv(con, f, chunk_rows)
+        else:
+            _write_columnar(con, f, fmt, chunk_rows)
+    return mark
+
+def build_export_bytes(db_path, fmt):
+    """Bytes del archivo de exportación con todos los registros vigentes"""
+    buffer = io.BytesIO()
+    write_records(get_pool(db_path), buffer, fmt)
+    return buffer.getvalue()
+
+def build_excel_bytes(db_path):
+    """Bytes del xlsx con todos los registros vigentes"""
+    return build_export_bytes(db_path, "xlsx")
+
+@timed()
+def write_export_file(pool, path, fmt=None):
+    """Escribe la exportación en un temporal y lo reemplaza de forma atómica.
+
+    Sin fmt, el formato se deduce de la extensión de path. Devuelve la
+    marca del historial que conoce el archivo, para remember_file.
+    """
+    path = Path(path)
+    fmt = fmt or export_format(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.stem}-", suffix=path.suffix, dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            mark = write_records(pool, f, fmt)
+        os.replace(tmp_path, path)
+        return mark
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+EXCEL_MIRROR_DELAY_S = 2.0  # Ventana para agrupar ráfagas de cambios
+EXCEL_MIRROR_MAX_DELAY_S = 30.0  # Espera máxima aunque sigan llegando cambios
+
+@timed()
+def write_excel_file(pool, path):
+    """Escribe el Excel completo en un temporal y lo reemplaza de forma atómica"""
+    return write_export_file(pool, path, "xlsx")
+
+class ExcelMirror:
+    """Mantiene registros.xlsx al día desde un único hilo en segundo plano.
+
+    Las mutaciones solo marcan el espejo como sucio; el hilo espera a que
+    pase EXCEL_MIRROR_DELAY_S sin cambios nuevos y exporta una sola vez.
+    """
+
+    def __init__(self, db_path, excel_path, delay=EXCEL_MIRROR_DELAY_S, max_delay=EXCEL_MIRROR_MAX_DELAY_S):
+        self.db_path = db_path
+        self.excel_path = Path(excel_path)
+        self.delay = delay
+        self.max_delay = max_delay
+        self.last_success = None
+        self.last_error = None
+        self._pool = ConnectionPool(db_path, size=1)
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = threading.Thread(target=self._run, name="excel-mirror", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        """Programa una exportación; varias llamadas seguidas se agrupan"""
+        with self._lock:
+            self._idle.clear()
+            self._dirty.set()
+
+    def flush(self, timeout=None):
+        """Espera a que no queden exportaciones pendientes"""
+        return self._idle.wait(timeout)
+
+    def status(self):
+        return {
+            "pending": not self._idle.is_set(),
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+        }
+
+    def _run(self):
+        while True:
+            self._dirty.wait()
+            started = time.monotonic()
+            while True:
+                self._dirty.clear()
+                remaining = self.max_delay - (time.monotonic() - started)
+                if remaining <= 0 or not self._dirty.wait(min(self.delay, remaining)):
+                    break
+            try:
+                mark = write_excel_file(self._pool, self.excel_path)
+                # El archivo recién exportado coincide con la base: sincronizarlo no debe hacer nada
+                remember_file(self._pool, self.excel_path, mark)
+                self.last_success = datetime.now()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            with self._lock:
+                if not self._dirty.is_set():
+                    self._idle.set()
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+def get_excel_mirror(db_path, excel_path):
+    """Exportador en segundo plano del archivo Excel fijo, uno por proceso"""
+    with _mirrors_lock:
+        mirror = _mirrors.get((db_path, excel_path))
+        if mirror is None:
+            mirror = _mirrors[(db_path, excel_path)] = ExcelMirror(db_path, excel_path)
+        return mirror
+
+@timed()
+def export_to_excel():
+    """Programa la actualización del archivo Excel fijo en segundo plano"""
+    get_excel_mirror(str(DB_PATH.resolve()), str(Path(EXCEL_FILE).resolve())).mark_dirty()
+    return True
+
+STAGING_PREFIX = f"{TABLE}_staging"
+STAGING_MAX_AGE = 24 * 3600  # Segundos; una tabla de staging más antigua es de una importación interrumpida
+
+def drop_stale_staging(con, max_age=STAGING_MAX_AGE):
+    """Elimina las tablas de staging que dejó una importación interrumpida.
+
+    El nombre lleva la hora de creación (<prefijo>_<epoch>_<uuid>): las más
+    nuevas que max_age pueden ser de una importación en curso de otra
+    sesión o proceso y se dejan. Devuelve las tablas eliminadas.
+    """
+    names = [name for (name,) in con.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND (name = ? OR name LIKE ? ESCAPE '\\')",
+        (STAGING_PREFIX, STAGING_PREFIX.replace("_", "\\_") + "\\_%")
+    )]
+    stale = []
+    for name in names:
+        stamp = name[len(STAGING_PREFIX) + 1:].split("_")[0]
+        if not stamp.isdigit() or time.time() - int(stamp) > max_age:
+            con.execute(f'DROP TABLE IF EXISTS "{name}"')
+            stale.append(name)
+    return stale
+
+def _insert_staging(con, staging, frame):
+    from excel_io import IMPORT_COLUMNS
+
+    con.executemany(
+        f"INSERT INTO {staging} ({', '.join(IMPORT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+        frame.itertuples(index=False, name=None)
+    )
+
+@timed()
+def import_records_streaming(chunks, progress=None, total=None):
+    """Carga bloques de la planilla en staging y luego reemplaza la tabla.
+
+    Cada bloque se normaliza y se confirma en su propia transacción, así la
+    memoria no crece con el tamaño del archivo. La tabla real solo se
+    reemplaza, en una única transacción, cuando todos los bloques cargaron;
+    si algo falla o ninguna fila es válida, la tabla original queda intacta.
+    Cada importación usa su propia tabla de staging, así dos importaciones
+    simultáneas no mezclan sus bloques; si ambas terminan, queda la última.
+    """
+    from excel_io import normalize_import_frame
+
+    pool = get_pool(DB_PATH)
+    staging = f"{STAGING_PREFIX}_{int(time.time())}_{uuid.uuid4().hex}"
+    with pool.connection(write=True) as con:
+        create_records_table(con, staging)
+        # Los ids nuevos parten después de los archivados para no repetirse en las consultas unidas
+        con.execute(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT ?, max(max_id) FROM {PARTITIONS_TABLE} "
+            f"HAVING max(max_id) IS NOT NULL",
+            (staging,)
+        )
+    try:
+        read = loaded = 0
+        rejected = []
+        for chunk in chunks:
+            frame, chunk_rejected = normalize_import_frame(chunk, RECORD_CATALOGS, CATALOG_FALLBACKS)
+            with pool.connection(write=True) as con:
+                _insert_staging(con, staging, frame)
+            read += len(chunk)
+            loaded += len(frame)
+            rejected.extend(chunk_rejected)
+            if progress:
+                progress(read, total)
+        if read and not loaded:
+            return 0, rejected
+        with pool.connection(write=True) as con:
+            drop_records_views(con)
+            con.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            con.execute(f"ALTER TABLE {staging} RENAME TO {TABLE}")
+            create_records_views(con)
+            create_records_indexes(con)
+            create_search_index(con, rebuild=True)
+            create_summary_table(con, rebuild=True)
+            create_history_table(con)
+            # Los ids vuelven a empezar: el historial anterior queda en la generación previa
+            con.execute(f"UPDATE {VERSIONS_TABLE} SET version = version + 1 WHERE tabla = ?", (ID_GENERATION,))
+            bump_table_version(con)
+        return loaded, rejected
+    finally:
+        with pool.connection(write=True) as con:
+            con.execute(f"DROP TABLE IF EXISTS {staging}")
+
+@timed()
+def import_from_excel(path, progress=None):
+    """Importa registros desde una planilla, reemplazando los actuales.
+
+    Acepta xlsx, CSV, Parquet y Arrow IPC según la extensión. El archivo se
+    lee por bloques; progress(filas_leídas, total) se llama tras confirmar
+    cada bloque. Devuelve (éxito, mensaje, rechazadas), donde rechazadas
+    lista las filas que no se pudieron importar y el motivo.
+    """
+    from excel_io import import_reader
+
+    try:
+        if not os.path.exists(path):
+            return False, f"Archivo {path} no encontrado", []
+
+        iter_chunks, count_rows = import_reader(path)
+        init_db()
+        imported, rejected = import_records_streaming(
+            iter_chunks(path),
+            progress=progress,
+            total=count_rows(path)
+        )
+        if not imported and rejected:
+            return False, "Ninguna fila del archivo es válida; no se modificaron los registros", rejected
+
+        remember_file(get_pool(DB_PATH), path)
+        message = f"{imported} registro(s) importado(s) correctamente"
+        if rejected:
+            message += f"; {len(rejected)} fila(s) rechazada(s)"
+        return True, message, rejected
+    except Exception as e:
+        return False, f"Error al importar: {str(e)}", []
+
+def import_from_fixed_excel(progress=None):
+    """Importa registros desde el archivo Excel fijo"""
+    return import_from_excel(EXCEL_FILE, progress)
+
+# =========================
+# Sincronización incremental con el archivo
+# =========================
+SYNC_HASH_BLOCK = 1 << 20
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(SYNC_HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+def history_mark(con):
+    """Id del último cambio del historial: lo posterior es desconocido para un archivo escrito ahora"""
+    return con.execute(f"SELECT coalesce(max(id), 0) FROM {HISTORY_TABLE}").fetchone()[0]
+
+def _remember_file(con, path, stat, sha256, mark=None):
+    # Sin mark se conserva la marca anterior: el contenido del archivo no cambió
+    con.execute(f"""
+        INSERT INTO {SYNC_TABLE} (archivo, mtime_ns, tamano, sha256, historial_id) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(archivo) DO UPDATE SET
+            mtime_ns = excluded.mtime_ns, tamano = excluded.tamano,
+            sha256 = excluded.sha256, sincronizado_en = datetime('now'),
+            historial_id = coalesce(excluded.historial_id, historial_id)
+    """, (str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size, sha256, mark))
+
+def remember_file(pool, path, mark=None):
+    """Registra la huella de un archivo que ya coincide con la base.
+
+    mark es la marca del historial cuando se leyó lo que contiene el
+    archivo (la que devuelve write_export_file); sin ella, la actual.
+    """
+    stat = os.stat(path)
+    sha256 = file_sha256(path)
+    with pool.connection(write=True) as con:
+        _remember_file(con, path, stat, sha256, history_mark(con) if mark is None else mark)
+
+def record_digest(values):
+    """Huella de los campos de IMPORT_COLUMNS de una fila, igual para la base y el archivo.
+
+    Solo se compara dentro del proceso, así que basta el hash de Python
+    (64 bits, sin guardar el texto de cada registro en memoria).
+    """
+    return hash(tuple(values))
+
+def _sync_result(success, message, rejected=(), **changes):
+    return success, message, list(rejected), {"altas": 0, "modificaciones": 0, "eliminaciones": 0, **changes}
+
+@timed()
+def sync_from_file(path, progress=None, force=False):
+    """Lleva los registros al contenido del archivo aplicando solo las diferencias.
+
+    Si la fecha de modificación y el tamaño coinciden con la última
+    sincronización no se lee el archivo; si cambiaron pero el SHA-256 es
+    el mismo, tampoco. Si no, las filas se emparejan por "N° Registro" (id):
+    las que no tienen id son altas, las de huella distinta se actualizan y
+    los registros vigentes que no aparecen se eliminan. Las altas, cambios
+    y eliminaciones se aplican en una sola transacción, así que los
+    triggers, el historial y los ids solo se tocan en las filas afectadas.
+    Una fila rechazada nunca elimina su registro, y un registro editado en
+    la app durante la sincronización se omite (se compara row_version).
+    Tampoco se tocan los registros creados o cambiados en la app después
+    de que se escribió el archivo (historial posterior a su marca, ver
+    remember_file): el archivo no los conoce, así que no estar en él o
+    traer otra versión no significa que el usuario los haya cambiado.
+
+    Devuelve (éxito, mensaje, rechazadas, cambios), con cambios
+    {"altas": n, "modificaciones": n, "eliminaciones": n}.
+    """
+    import pandas as pd
+    from excel_io import IMPORT_COLUMNS, IMPORT_RENAME_MAP, import_reader, normalize_import_frame
+
+    try:
+        if not os.path.exists(path):
+            return _sync_result(False, f"Archivo {path} no encontrado")
+        iter_chunks, count_rows = import_reader(path)
+        init_db()
+        pool = get_pool(DB_PATH)
+        stat = os.stat(path)
+        with pool.connection() as con:
+            state = con.execute(
+                f"SELECT mtime_ns, tamano, sha256, historial_id FROM {SYNC_TABLE} WHERE archivo = ?",
+                (str(Path(path).resolve()),)
+            ).fetchone()
+        if not force and state and tuple(state[:2]) == (stat.st_mtime_ns, stat.st_size):
+            return _sync_result(True, "El archivo no cambió desde la última sincronización")
+        sha256 = file_sha256(path)
+        if not force and state and state[2] == sha256:
+            with pool.connection(write=True) as con:
+                _remember_file(con, path, stat, sha256)
+            return _sync_result(True, "El contenido del archivo no cambió desde la última sincronización")
+
+        # Huella, row_version y marca de eliminación de cada registro de la base
+        with pool.connection() as con:
+            current = {
+                row_id: (record_digest(values), version, deleted)
+                for row_id, version, deleted, *values in con.execute(
+                    f"SELECT id, row_version, deleted_at IS NOT NULL, {', '.join(IMPORT_COLUMNS)} FROM {TABLE}"
+                )
+            }
+            archived = archived_ids(con, DB_PATH)
+            newer_in_app = set() if not state or state[3] is None else {
+                row_id for (row_id,) in con.execute(
+                    f"SELECT DISTINCT record_id FROM {HISTORY_TABLE} WHERE id > ? "
+                    f"AND generacion = (SELECT version FROM {VERSIONS_TABLE} WHERE tabla = '{ID_GENERATION}')",
+                    (state[3],)
+                )
+            }
+
+        total = count_rows(path)
+        file_ids, kept_ids = set(), set()
+        inserts, inserts_with_id, updates, rejected = [], [], [], []
+        read = unchanged = skipped_archived = stale = 0
+        for chunk in iter_chunks(path):
+            if "id" not in chunk.rename(columns=IMPORT_RENAME_MAP).columns:
+                return _sync_result(
+                    False, "El archivo no tiene la columna N° Registro; use Importar para reemplazar todos los registros"
+                )
+            frame, chunk_rejected = normalize_import_frame(chunk, RECORD_CATALOGS, CATALOG_FALLBACKS, keep_id=True)
+            # Los ids de filas rechazadas se conservan: una fila mal escrita no borra su registro
+            raw_ids = pd.to_numeric(chunk.rename(columns=IMPORT_RENAME_MAP)["id"], errors="coerce")
+            kept_ids.update(int(i) for i in raw_ids.loc[[r["fila"] for r in chunk_rejected]].dropna())
+            rejected.extend(chunk_rejected)
+            for fila, row_id, *values in frame.astype(object).itertuples(name=None):
+                if row_id is pd.NA:
+                    inserts.append(values)
+                    continue
+                if row_id in file_ids:
+                    rejected.append({"fila": int(fila), "motivo": f"N° Registro {row_id} duplicado"})
+                    continue
+                file_ids.add(row_id)
+                known = current.get(row_id)
+                if known is None and row_id in archived:
+                    skipped_archived += 1  # Año archivado: el archivo no lo modifica ni lo vuelve a dar de alta
+                elif known is None:
+                    inserts_with_id.append((row_id, *values))
+                elif known[2] or known[0] != record_digest(values):
+                    if row_id in newer_in_app:
+                        stale += 1
+                    else:
+                        updates.append((*values, row_id, known[1]))
+                else:
+                    unchanged += 1
+            read += len(chunk)
+            if progress:
+                progress(read, total)
+        if read and not (file_ids or inserts):
+            return _sync_result(False, "Ninguna fila del archivo es válida; no se modificaron los registros", rejected)
+
+        missing = [
+            (row_id, version) for row_id, (_, version, deleted) in current.items()
+            if not deleted and row_id not in file_ids and row_id not in kept_ids
+        ]
+        deletes = [(row_id, version) for row_id, version in missing if row_id not in newer_in_app]
+        stale += len(missing) - len(deletes)
+        assignments = ", ".join(f"{column} = ?" for column in IMPORT_COLUMNS)
+        placeholders = ", ".join("?" * len(IMPORT_COLUMNS))
+        with pool.connection(write=True) as con:
+            updated = con.executemany(
+                f"UPDATE {TABLE} SET {assignments}, deleted_at = NULL, {NEXT_ROW_VERSION} "
+                f"WHERE id = ? AND row_version = ?",
+                updates
+            ).rowcount
+            con.executemany(
+                f"INSERT INTO {TABLE} (id, {', '.join(IMPORT_COLUMNS)}) VALUES (?, {placeholders})", inserts_with_id
+            )
+            con.executemany(f"INSERT INTO {TABLE} ({', '.join(IMPORT_COLUMNS)}) VALUES ({placeholders})", inserts)
+            if SOFT_DELETE:
+                delete_sql = (
+                    f"UPDATE {TABLE} SET deleted_at = datetime('now'), {NEXT_ROW_VERSION} "
+                    f"WHERE id = ? AND row_version = ? AND deleted_at IS NULL"
+                )
+            else:
+                delete_sql = f"DELETE FROM {TABLE} WHERE id = ? AND row_version = ?"
+            deleted = con.executemany(delete_sql, deletes).rowcount
+            # Con registros omitidos el archivo sigue sin conocerlos: se conserva la marca anterior
+            _remember_file(con, path, stat, sha256, None if stale else history_mark(con))
+            inserted = len(inserts) + len(inserts_with_id)
+            if updated or inserted or deleted:
+                bump_table_version(con)
+
+        skipped = len(updates) - updated + len(deletes) - deleted
+        message = (
+            f"Sincronización: {inserted} alta(s), {updated} modificación(es), "
+            f"{deleted} eliminación(es), {unchanged} sin cambios"
+        )
+        if skipped:
+            message += f"; {skipped} registro(s) omitido(s) por cambios simultáneos en la app"
+        if stale:
+            message += f"; {stale} registro(s) omitido(s) por cambios en la app posteriores al archivo"
+        if skipped_archived:
+            message += f"; {skipped_archived} fila(s) de años archivados omitida(s)"
+        if rejected:
+            message += f"; {len(rejected)} fila(s) rechazada(s)"
+        return _sync_result(True, message, rejected, altas=inserted, modificaciones=updated, eliminaciones=deleted)
+    except Exception as e:
+        return _sync_result(False, f"Error al sincronizar: {str(e)}")
+
+def sync_from_fixed_excel(progress=None, force=False):
+    """Sincroniza los registros con el archivo Excel fijo"""
+    return sync_from_file(EXCEL_FILE, progress, force)
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Configuración compartida por las pruebas.
+
+Las pruebas nunca tocan las bases del repositorio: cada una trabaja en su
+propio directorio temporal.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))  # storage, excel_io y benchmarks
+
+import storage  # noqa: E402
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Ruta de una base temporal, configurada como la base de storage"""
+    path = tmp_path / "seguimiento_regional.db"
+    monkeypatch.setattr(storage, "DB_PATH", path)
+    monkeypatch.chdir(tmp_path)
+    yield path
+    storage.get_pool(path).close()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Ediciones concurrentes del mismo registro con control por row_version."""
+import threading
+
+import storage
+from benchmarks.generate import synthetic_frame, write_app_database
+
+THREADS = 8
+EDITS = 25
+
+def increment(record_id, edits):
+    """Lee → suma 1 a plazo_dias → guarda con expected_version, reintentando cada conflicto"""
+    for _ in range(edits):
+        while True:
+            record = storage.get_record(record_id)
+            changes = {field: record[field] for field in storage.BATCH_UPDATE_COLUMNS}
+            changes["plazo_dias"] += 1
+            try:
+                storage.update_record(record_id, changes, record["row_version"])
+                break
+            except storage.ConflictError:
+                pass
+
+def test_no_edit_is_lost(db_path):
+    write_app_database(db_path, synthetic_frame(20))
+    storage.init_db()
+    record_id = 1
+    storage.update_record(record_id, {**storage.get_record(record_id), "plazo_dias": 0})
+    base = storage.get_record(record_id)
+
+    barrier = threading.Barrier(THREADS)
+
+    def worker():
+        barrier.wait()
+        increment(record_id, EDITS)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    final = storage.get_record(record_id)
+    assert final["plazo_dias"] == THREADS * EDITS
+    assert final["row_version"] == base["row_version"] + THREADS * EDITS
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Importación y sincronización desde planillas."""
+import time
+
+import pytest
+
+import storage
+
+HEADER = "N° Registro,Dirección Regional,Ítem Monitoreo,Detalle,Estado,Plazo (días),Fecha Reunión\n"
+ROWS = [
+    ",Maule,Clima Laboral,válida,Pendiente,10,05-01-2026\n",
+    ",Ñuble,Infraestructura,plazo negativo,Pendiente,-5,06-01-2026\n",
+]
+
+@pytest.fixture
+def csv_file(db_path):
+    path = db_path.parent / "registros.csv"
+    path.write_text(HEADER + "".join(ROWS), encoding="utf-8")
+    return path
+
+def stored_details():
+    with storage.get_pool(storage.DB_PATH).connection() as con:
+        return [detalle for (detalle,) in con.execute(f"SELECT detalle FROM {storage.TABLE} ORDER BY id")]
+
+def test_import_rejects_negative_plazo(csv_file):
+    success, _, rejected = storage.import_from_excel(csv_file)
+    assert success
+    assert rejected == [{"fila": 3, "motivo": "Plazo (días) negativo"}]
+    assert stored_details() == ["válida"]
+
+def test_sync_rejects_negative_plazo(csv_file):
+    storage.init_db()
+    success, _, rejected, changes = storage.sync_from_file(csv_file)
+    assert success
+    assert rejected == [{"fila": 3, "motivo": "Plazo (días) negativo"}]
+    assert changes["altas"] == 1
+    assert stored_details() == ["válida"]
+
+def test_init_db_drops_interrupted_staging_tables(db_path):
+    storage.init_db()
+    old = f"{storage.STAGING_PREFIX}_{int(time.time()) - storage.STAGING_MAX_AGE - 60}_{'a' * 32}"
+    in_progress = f"{storage.STAGING_PREFIX}_{int(time.time())}_{'b' * 32}"
+    with storage.get_pool(db_path).connection(write=True) as con:
+        for name in (storage.STAGING_PREFIX, f"{storage.STAGING_PREFIX}_{'c' * 32}", old, in_progress):
+            storage.create_records_table(con, name)
+    storage.init_db()
+    with storage.get_pool(db_path).connection() as con:
+        tables = {name for (name,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {name for name in tables if name.startswith(storage.STAGING_PREFIX)} == {in_progress}
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Migración de una base con el esquema original (user_version 0)."""
+import sqlite3
+
+import pytest
+
+import storage
+
+# Esquema de registros tal como lo creaba la primera versión de app.py
+BASELINE_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {storage.TABLE}(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        direccion_regional TEXT NOT NULL,
+        item_monitoreo TEXT NOT NULL,
+        detalle TEXT NOT NULL,
+        estado TEXT,
+        plazo_dias INTEGER,
+        fecha_reunion TEXT
+    );
+"""
+
+# (id, direccion_regional, item_monitoreo, detalle, estado, plazo_dias, fecha_reunion)
+LEGACY_ROWS = [
+    (1, "Bío-Bío", "Tema: Otros", "-Acta con región y tema antiguos", "", 10, "2024-03-05"),
+    (2, "Metropolitana", "Clima Laboral", "-Acta sin plazo", "En progreso", None, "2024-04-12"),
+    (4, "Magallanes", "Informática", "-Acta tras un registro eliminado", "completado", 30, "2024-05-20"),
+]
+LAST_SEQ = 7  # Se crearon registros que después se borraron
+
+def legacy_database(path, rows=LEGACY_ROWS):
+    con = sqlite3.connect(path, isolation_level=None)
+    try:
+        con.execute(BASELINE_SCHEMA)
+        con.executemany(f"INSERT INTO {storage.TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        con.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (LAST_SEQ, storage.TABLE))
+    finally:
+        con.close()
+
+def migrate(path):
+    """storage.migrate en una transacción BEGIN IMMEDIATE, como init_db"""
+    con = sqlite3.connect(path, isolation_level=None)
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            storage.migrate(con)
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+    finally:
+        con.close()
+
+def dump(path):
+    con = sqlite3.connect(path)
+    try:
+        return list(con.iterdump()), con.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        con.close()
+
+@pytest.fixture
+def migrated(tmp_path):
+    """Base legada ya migrada; devuelve una conexión"""
+    path = tmp_path / "seguimiento_regional.db"
+    legacy_database(path)
+    migrate(path)
+    con = sqlite3.connect(path, isolation_level=None)
+    yield con
+    con.close()
+
+def test_migrates_legacy_database(migrated):
+    assert migrated.execute("PRAGMA user_version").fetchone()[0] == storage.SCHEMA_VERSION
+    rows = migrated.execute(
+        f"SELECT id, direccion_regional, item_monitoreo, estado, plazo_dias, fecha_reunion FROM {storage.TABLE} ORDER BY id"
+    ).fetchall()
+    assert rows == [
+        (1, "Biobío", "Otros", None, 10, "2024-03-05"),
+        (2, "Metropolitana", "Clima Laboral", "En progreso", 0, "2024-04-12"),
+        (4, "Magallanes", "Informática", "Completado", 30, "2024-05-20"),
+    ]
+    seq = migrated.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (storage.TABLE,)).fetchone()[0]
+    assert seq == LAST_SEQ
+
+    new_id = migrated.execute(
+        f"INSERT INTO {storage.TABLE} (direccion_regional, item_monitoreo, detalle, estado, plazo_dias, fecha_reunion) "
+        "VALUES ('Ñuble', 'Otros', '-Alta tras migrar', 'Pendiente', 5, '2024-06-01')"
+    ).lastrowid
+    assert new_id == LAST_SEQ + 1
+
+@pytest.mark.parametrize("column, value", [
+    ("direccion_regional", "Bío-Bío"),
+    ("item_monitoreo", "Tema: Otros"),
+    ("estado", "Cerrado"),
+    ("plazo_dias", -1),
+    ("fecha_reunion", "05-03-2024"),
+])
+def test_checks_reject_values_outside_catalogs(migrated, column, value):
+    record = {
+        "direccion_regional": "Maule", "item_monitoreo": "Otros", "detalle": "-Prueba de CHECK",
+        "estado": "Pendiente", "plazo_dias": 0, "fecha_reunion": "2024-06-01", column: value,
+    }
+    with pytest.raises(sqlite3.IntegrityError, match="CHECK"):
+        migrated.execute(
+            f"INSERT INTO {storage.TABLE} ({', '.join(record)}) VALUES ({', '.join('?' * len(record))})",
+            list(record.values())
+        )
+
+def test_unresolvable_value_leaves_database_untouched(tmp_path):
+    path = tmp_path / "seguimiento_regional.db"
+    legacy_database(path, LEGACY_ROWS + [
+        (5, "Región Desconocida", "Otros", "-Región que no está en el catálogo", "Pendiente", 0, "2024-06-01"),
+    ])
+    before = dump(path)
+
+    with pytest.raises(storage.MigrationError, match=r"en los id 5$"):
+        migrate(path)
+
+    assert dump(path) == before